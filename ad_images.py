@@ -0,0 +1,130 @@
+"""
+ad_images.py - Ad image validation, resizing, transcoding and deduplication
+
+Uploaded images are decoded (never trusted by content type), then stored as
+WebP and JPEG variants at AD_IMAGE_WIDTHS. File names are content hashes, so
+identical variants are written once and can be cached forever.
+"""
+
+import io
+import os
+import asyncio
+import hashlib
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+import config
+
+AD_IMAGE_DIR = os.path.join("static", "ads")
+AD_IMAGE_URL = "/static/ads"
+
+# Pillow format name -> accepted upload
+ALLOWED_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+
+# Output format -> (extension, Pillow save options)
+OUTPUT_FORMATS = {
+    "webp": (".webp", {"format": "WEBP", "quality": 80, "method": 6}),
+    "jpeg": (".jpg", {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+class InvalidAdImage(ValueError):
+    pass
+
+
+def decode_image(content: bytes) -> Image.Image:
+    """
+    Decode and validate an uploaded image; raises InvalidAdImage
+    """
+    try:
+        with Image.open(io.BytesIO(content)) as probe:
+            if probe.format not in ALLOWED_FORMATS:
+                raise InvalidAdImage("Faqat JPG, PNG, GIF yoki WEBP rasmlar")
+            if probe.width * probe.height > config.MAX_IMAGE_PIXELS:
+                raise InvalidAdImage("Rasm o'lchami juda katta")
+            probe.verify()
+
+        # verify() leaves the image unusable, so decode it again for real
+        image = Image.open(io.BytesIO(content))
+        image.load()
+    except InvalidAdImage:
+        raise
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise InvalidAdImage("Rasm fayli noto'g'ri yoki buzilgan")
+
+    # Respect camera orientation; animated GIFs keep their first frame
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    return image
+
+
+def target_widths(width: int) -> List[int]:
+    """
+    Configured widths below the original, plus the original (never upscaled)
+    """
+    widths = [target for target in config.AD_IMAGE_WIDTHS if target < width]
+    widths.append(min(width, max(config.AD_IMAGE_WIDTHS)))
+    return sorted(set(widths))
+
+
+def encode_variant(image: Image.Image, output_format: str) -> bytes:
+    _, options = OUTPUT_FORMATS[output_format]
+    if output_format == "jpeg" and image.mode == "RGBA":
+        # JPEG has no alpha: flatten onto the white modal background
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def build_variants(content: bytes, directory: str = AD_IMAGE_DIR) -> Dict[str, List[dict]]:
+    """
+    Write every variant under its content hash and return
+    {"webp": [{"url", "width"}, ...], "jpeg": [...]} ordered by width
+    """
+    image = decode_image(content)
+    os.makedirs(directory, exist_ok=True)
+    variants = {output_format: [] for output_format in OUTPUT_FORMATS}
+
+    for width in target_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for output_format, (extension, _) in OUTPUT_FORMATS.items():
+            data = encode_variant(resized, output_format)
+            filename = f"ad_{hashlib.sha256(data).hexdigest()[:20]}{extension}"
+            filepath = os.path.join(directory, filename)
+            if not os.path.exists(filepath):
+                tmp_path = f"{filepath}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, filepath)
+            variants[output_format].append({"url": f"{AD_IMAGE_URL}/{filename}", "width": width})
+    return variants
+
+
+async def save_ad_image(file_content: bytes) -> Dict[str, List[dict]]:
+    """
+    Validate and store an uploaded ad image (decoding runs in a thread)
+    """
+    return await asyncio.to_thread(build_variants, file_content)
+
+
+def fallback_url(variants: Dict[str, List[dict]]) -> str:
+    """
+    Largest JPEG, shown by browsers that ignore srcset
+    """
+    return variants["jpeg"][-1]["url"]
+
+
+def srcset(variants: Optional[Dict[str, List[dict]]], output_format: str) -> Optional[str]:
+    if not variants or not variants.get(output_format):
+        return None
+    return ", ".join(f"{variant['url']} {variant['width']}w" for variant in variants[output_format])
+
+
+def variant_urls(variants: Optional[Dict[str, List[dict]]]) -> set:
+    return {variant["url"] for entries in (variants or {}).values() for variant in entries}
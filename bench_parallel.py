@@ -0,0 +1,94 @@
+"""
+bench_parallel.py - Find the input size where parallel conversion pays off
+
+Usage:
+    python bench_parallel.py [-j WORKERS] [--max-chars N]    # WORKERS defaults to the CPU count
+
+Prints serial vs process-pool timings for growing inputs and the size from
+which the pool keeps winning; use it to tune PARALLEL_THRESHOLD_CHARS in config.py.
+"""
+
+import os
+import time
+import random
+import argparse
+
+import config
+import converter
+
+# Zipf-like sample vocabulary (frequent words first)
+WORDS = (
+    "va bu bilan uchun ham o‘zbek tili shahar yangi kitob maktab o‘qituvchi "
+    "g‘alaba yoshlar ish vaqt kun yil odam xalq davlat hayot dunyo til "
+    "Toshkent Samarqand Buxoro mustaqillik ta'lim ma'naviyat iqtisodiyot"
+).split()
+
+
+def make_text(chars: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    parts, size = [], 0
+    while size < chars:
+        sentence = " ".join(rng.choices(WORDS, weights, k=12)).capitalize() + ".\n"
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)[:chars]
+
+
+def best_time(func, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-chars", type=int, default=8_000_000)
+    args = parser.parse_args()
+
+    config.PARALLEL_WORKERS = args.workers
+    direction = "latin_to_cyrillic"
+
+    def serial(text):
+        return converter.UzbekConverter.convert(text, direction)
+
+    def parallel(text):
+        segments = converter.split_segments(text, config.PARALLEL_SEGMENT_CHARS)
+        config.PARALLEL_THRESHOLD_CHARS = 0
+        return "".join(converter.convert_segments(segments, direction))
+
+    # Warm up the pool and every word memo
+    parallel(make_text(config.PARALLEL_SEGMENT_CHARS * args.workers * 2))
+
+    print(f"workers={args.workers} segment={config.PARALLEL_SEGMENT_CHARS} chars")
+    if args.workers < 2:
+        print("⚠️ With one worker the pool is not used; pass -j 2 or more")
+    print(f"{'chars':>10} {'serial ms':>10} {'parallel ms':>12} {'speedup':>8}")
+    crossover = None
+    chars = 16_000
+    while chars <= args.max_chars:
+        text = make_text(chars)
+        assert serial(text) == parallel(text)
+        serial_time = best_time(lambda: serial(text))
+        parallel_time = best_time(lambda: parallel(text))
+        speedup = serial_time / parallel_time
+        print(f"{chars:>10} {serial_time * 1000:>10.1f} {parallel_time * 1000:>12.1f} {speedup:>7.2f}x")
+        if speedup <= 1:
+            crossover = None
+        elif crossover is None:
+            crossover = chars
+        chars *= 2
+
+    converter.shutdown_process_pool()
+    if crossover:
+        print(f"✅ Parallel conversion wins from about {crossover} characters")
+    else:
+        print("❌ Parallel conversion never won (single core or small inputs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+cancellation.py - Request deadlines and client-disconnect cancellation
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable
+
+from fastapi import Request
+
+from converter import ConversionCancelled
+
+
+class RequestCancelled(Exception):
+    """
+    The request hit its deadline or the client went away
+    """
+
+    def __init__(self, reason: str, elapsed: float, result: Any = None):
+        super().__init__(reason)
+        self.reason = reason  # 'deadline' or 'disconnected'
+        self.elapsed = elapsed
+        self.result = result  # Set when the work finished anyway
+
+
+class CancellationMetrics:
+    """
+    Counters of cancelled work per route and reason
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def record(self, route: str, reason: str, elapsed: float):
+        self.counts[(route, reason)] += 1
+        self.seconds[(route, reason)] += elapsed
+
+    def stats(self) -> list:
+        return [
+            {
+                "route": route,
+                "reason": reason,
+                "count": count,
+                "seconds_before_cancel": round(self.seconds[(route, reason)], 3)
+            }
+            for (route, reason), count in sorted(self.counts.items())
+        ]
+
+
+async def run_cancellable(
+    request: Request,
+    work: Awaitable,
+    cancel_event: threading.Event,
+    deadline_seconds: float,
+    poll_interval: float = 0.25
+):
+    """
+    Await work while watching the deadline and the client connection.
+    On either, set cancel_event (the conversion stops at its next paragraph)
+    and raise RequestCancelled.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(work)
+    started = loop.time()
+    reason = None
+
+    while True:
+        remaining = deadline_seconds - (loop.time() - started)
+        if remaining <= 0:
+            reason = "deadline"
+            break
+        done, _ = await asyncio.wait({task}, timeout=min(poll_interval, remaining))
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            reason = "disconnected"
+            break
+
+    cancel_event.set()
+    result = None
+    try:
+        result = await task
+    except ConversionCancelled:
+        pass
+    raise RequestCancelled(reason, loop.time() - started, result)
@@ -0,0 +1,231 @@
+"""
+cli.py - Command-line bulk converter for Latinify
+
+Usage:
+    python cli.py INPUT_DIR -o OUTPUT_DIR [-d DIRECTION] [-j JOBS] [--manifest FILE]
+    cat file.txt | python cli.py - > converted.txt
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import config
+from converter import (
+    TEXT_EXTENSIONS, DOCX_EXTENSIONS, DEFAULT_CHUNK_SIZE,
+    convert_file, convert_text_chunks, iter_text_chunks
+)
+
+DIRECTIONS = ("auto", "latin_to_cyrillic", "cyrillic_to_latin")
+MANIFEST_NAME = ".latinify-manifest.json"
+
+
+def file_sha256(filepath: str) -> str:
+    """
+    Hash file contents in 1MB blocks
+    """
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def convert_one(
+    input_path: str,
+    output_path: str,
+    direction: str,
+    chunk_size: int,
+    previous_hash: Optional[str]
+) -> dict:
+    """
+    Convert a single file (runs inside a pool worker)
+    """
+    result = {"input": input_path, "bytes": os.path.getsize(input_path)}
+    try:
+        result["sha256"] = file_sha256(input_path)
+        if result["sha256"] == previous_hash and os.path.exists(output_path):
+            result["status"] = "skipped"
+            return result
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        convert_file(input_path, output_path, direction, chunk_size)
+        result["status"] = "converted"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    return result
+
+
+def init_worker():
+    """
+    Pool workers already use every core; keep each document on its own worker
+    """
+    config.PARALLEL_WORKERS = 1
+
+
+def find_files(input_dir: str):
+    """
+    Yield relative paths of convertible files under input_dir
+    """
+    extensions = TEXT_EXTENSIONS | DOCX_EXTENSIONS
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.startswith("~$"):  # Word lock files
+                continue
+            if os.path.splitext(filename)[1].lower() in extensions:
+                yield os.path.relpath(os.path.join(root, filename), input_dir)
+
+
+def load_manifest(manifest_path: str) -> dict:
+    """
+    Load {relative path: {"sha256": ..., "direction": ...}} manifest
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest_path: str, manifest: dict):
+    """
+    Write manifest atomically
+    """
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def convert_tree(
+    input_dir: str,
+    output_dir: str,
+    direction: str = "auto",
+    jobs: Optional[int] = None,
+    manifest_path: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> dict:
+    """
+    Convert every .txt/.docx file under input_dir into output_dir,
+    keeping the directory structure. Returns throughput statistics.
+    """
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    stats = {"converted": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker) as pool:
+        futures = {}
+        for relpath in find_files(input_dir):
+            previous = manifest.get(relpath, {})
+            previous_hash = previous.get("sha256") if previous.get("direction") == direction else None
+            future = pool.submit(
+                convert_one,
+                os.path.join(input_dir, relpath),
+                os.path.join(output_dir, relpath),
+                direction,
+                chunk_size,
+                previous_hash
+            )
+            futures[future] = relpath
+
+        for future in as_completed(futures):
+            relpath = futures[future]
+            result = future.result()
+            stats[result["status"]] += 1
+            if result["status"] == "failed":
+                manifest.pop(relpath, None)
+                print(f"❌ {relpath}: {result['error']}", file=sys.stderr)
+                continue
+            manifest[relpath] = {"sha256": result["sha256"], "direction": direction}
+            if result["status"] == "converted":
+                stats["bytes"] += result["bytes"]
+
+    if manifest_path:
+        save_manifest(manifest_path, manifest)
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def print_stats(stats: dict):
+    """
+    Print throughput summary to stderr
+    """
+    seconds = max(stats["seconds"], 1e-9)
+    megabytes = stats["bytes"] / (1024 * 1024)
+    print(
+        f"✅ {stats['converted']} converted, {stats['skipped']} skipped, "
+        f"{stats['failed']} failed in {stats['seconds']:.2f}s "
+        f"({stats['converted'] / seconds:.1f} files/s, {megabytes / seconds:.2f} MB/s)",
+        file=sys.stderr
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="latinify",
+        description="Convert Uzbek .txt and .docx files between Latin and Cyrillic"
+    )
+    parser.add_argument("input", help="input directory, file, or - for stdin")
+    parser.add_argument("-o", "--output", help="output directory (or file); stdout if omitted for stdin")
+    parser.add_argument("-d", "--direction", choices=DIRECTIONS, default="auto")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--manifest", help=f"hash manifest to skip unchanged files (default: OUTPUT/{MANIFEST_NAME})")
+    parser.add_argument("--no-manifest", action="store_true", help="always convert every file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="characters per streamed text chunk")
+    args = parser.parse_args(argv)
+
+    # stdin -> stdout (or file), streamed in chunks
+    if args.input == "-":
+        stdin = open(sys.stdin.fileno(), "r", encoding="utf-8-sig", newline="", closefd=False)
+        out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            for converted in convert_text_chunks(iter_text_chunks(stdin, args.chunk_size), args.direction):
+                out.write(converted)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return 0
+
+    # Single file
+    if os.path.isfile(args.input):
+        if not args.output:
+            parser.error("--output is required for file input")
+        started = time.perf_counter()
+        result = convert_one(args.input, args.output, args.direction, args.chunk_size, None)
+        if result["status"] == "failed":
+            print(f"❌ {args.input}: {result['error']}", file=sys.stderr)
+            return 1
+        print_stats({
+            "converted": 1, "skipped": 0, "failed": 0,
+            "bytes": result["bytes"], "seconds": time.perf_counter() - started
+        })
+        return 0
+
+    # Directory tree
+    if not os.path.isdir(args.input):
+        parser.error(f"input not found: {args.input}")
+    if not args.output:
+        parser.error("--output is required for directory input")
+
+    manifest_path = None
+    if not args.no_manifest:
+        manifest_path = args.manifest or os.path.join(args.output, MANIFEST_NAME)
+    os.makedirs(args.output, exist_ok=True)
+
+    stats = convert_tree(
+        args.input, args.output, args.direction, args.jobs, manifest_path, args.chunk_size
+    )
+    print_stats(stats)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
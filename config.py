@@ -29,14 +29,80 @@ ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # Set in environment or generated in mai
 # File upload settings
 MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
 ALLOWED_DOCX_EXTENSIONS = {".docx"}
+ALLOWED_TEXT_EXTENSIONS = {".txt", ".srt", ".csv"}
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 MAX_IMAGE_SIZE = 2 * 1024 * 1024  # 2MB
+MAX_IMAGE_PIXELS = 40_000_000  # decoded pixels, guards against decompression bombs
+AD_IMAGE_WIDTHS = (320, 500, 1000)  # ad modal is 500px wide, 1000 for 2x screens
+MAX_BATCH_TEXTS = 100  # texts per /api/convert-text-batch request
+MAX_TEXT_FILE_SIZE = 50 * 1024 * 1024  # 50MB, text files are streamed
+TEXT_STREAM_CHUNK = 64 * 1024  # bytes read from an uploaded text file at a time
+MAX_BATCH_FILES = 50  # DOCX files per batch upload
+BATCH_CONCURRENCY = 4  # batch files converted at the same time
+
+# Worker processes for the production launcher (python main.py)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+# Intra-document parallel conversion (see bench_parallel.py for the crossover)
+PARALLEL_THRESHOLD_CHARS = int(os.getenv("PARALLEL_THRESHOLD_CHARS", 400_000))
+PARALLEL_SEGMENT_CHARS = 128 * 1024  # characters per pickled slice
+# Web worker processes actually running: the launcher exports WEB_CONCURRENCY
+# to its workers, a plain `uvicorn main:app` runs a single one
+WEB_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+# Pool processes per web worker: all cores for a single worker, otherwise a
+# share of them but at least 2, so large documents still use the pool
+PARALLEL_WORKERS = int(os.getenv(
+    "PARALLEL_WORKERS",
+    min(os.cpu_count() or 1, max(2, (os.cpu_count() or 1) // WEB_WORKERS))
+))
 
 # Advertisement settings
 DEFAULT_AD_DELAY = 5  # seconds
 DEFAULT_MODAL_DELAY = 5  # seconds
 ADS_ENABLED_DEFAULT = True
-FILE_CLEANUP_INTERVAL = 15  # seconds
+FILE_CLEANUP_INTERVAL = 15  # seconds between uploads/ sweeps
+# Converted files untouched for this long are removed; downloads refresh
+# the file's mtime while they are being served
+FILE_RETENTION = int(os.getenv("FILE_RETENTION", 15 * 60))  # seconds
+# Delete a converted file (and its job) once it has been downloaded in full (a 200 response)
+DOWNLOAD_ONE_SHOT = os.getenv("DOWNLOAD_ONE_SHOT", "0") == "1"
+
+# Live conversion over /ws/convert (see live_document.py)
+LIVE_BLOCK_CHARS = 2048  # document block size; an edit re-converts about one block
+LIVE_MAX_CHARS = 1_000_000  # largest live document (UTF-16 code units)
+
+# Per-route conversion deadlines in seconds (work is cancelled after this)
+CONVERSION_DEADLINES = {
+    "/api/convert-text": 15,
+    "/api/convert-text-batch": 30,
+    "/api/upload-docx": 60,
+    # Streamed responses: the whole transfer, not just the first byte
+    "/api/upload-docx-batch": 300,
+    "/api/convert-file": 120,
+}
+
+# Rate limiting (per client IP token buckets, per worker process)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_CAPACITY = 120  # tokens a client may spend in a burst
+RATE_LIMIT_REFILL_PER_SECOND = 2.0
+RATE_LIMIT_MAX_CLIENTS = 100_000  # buckets kept in memory
+RATE_LIMIT_IDLE_SECONDS = 10 * 60  # idle buckets expire after this
+RATE_LIMIT_ROUTES = {
+    # Text costs by length, DOCX by uploaded bytes (5MB file ~ 104 tokens)
+    "/api/convert-text": {"base_cost": 1, "cost_per_kb": 0.1, "max_concurrent": 32},
+    "/api/convert-text-batch": {"base_cost": 2, "cost_per_kb": 0.1, "max_concurrent": 16},
+    "/api/upload-docx": {"base_cost": 2, "cost_per_kb": 0.02, "max_concurrent": 8},
+    "/api/upload-docx-batch": {"base_cost": 5, "cost_per_kb": 0.02, "max_concurrent": 4},
+    "/api/convert-file": {"base_cost": 2, "cost_per_kb": 0.005, "max_concurrent": 8},
+    # Live conversion is charged per message; steady typing stays under the refill rate
+    "/ws/convert": {"base_cost": 0.2, "cost_per_kb": 0.1, "max_per_client": 4},
+}
+
+# Response compression (static files are precompressed at startup)
+GZIP_PATHS = ("/api/convert-text",)  # also matches /api/convert-text-batch
+
+# Touched on every settings or ads update; its mtime versions cached pages and ads across workers
+SETTINGS_VERSION_FILE = os.path.join(DATA_DIR, "settings.version")
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR}/latinify.db")
@@ -51,6 +117,31 @@ CORS_ORIGINS = [
 
 # Session settings
 SESSION_TIMEOUT = 24 * 60 * 60  # 24 hours in seconds
+JOB_RETENTION = 60 * 60  # Keep conversion job records for 1 hour
+STATE_CLEANUP_INTERVAL = 10 * 60  # seconds between shared state sweeps
+
+# Conversion log retention (see retention.py)
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", 30))  # older rows are archived
+LOG_MAX_ROWS = int(os.getenv("LOG_MAX_ROWS", 200_000))  # rows kept in the database
+LOG_ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")  # gzip JSONL files, one per day
+LOG_RETENTION_INTERVAL = 60 * 60  # seconds between retention passes
+LOG_RETENTION_BATCH = 5000  # rows per archive transaction
+LOG_VACUUM_PAGES = 10_000  # free pages returned to the filesystem per pass
+
+# Warm-start snapshot of in-process caches (see snapshot.py)
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true"
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "warm_start.json.gz")
+SNAPSHOT_INTERVAL = 5 * 60  # seconds between periodic snapshots
+
+# Admin list pages (keyset pagination)
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 200
+
+# Request tracing and on-demand profiling (see tracing.py)
+TRACE_PATHS = ("/api/",)  # path prefixes that get a per-request trace
+TRACE_BUFFER_SIZE = 500  # recent traces kept per worker
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")  # merged cProfile stats (.prof)
+PROFILE_MAX_REQUESTS = 100  # upper bound for one profiling session
 
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
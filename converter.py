@@ -1,16 +1,90 @@
+import io
 import os
 import re
+import csv
 import uuid
+import codecs
+import itertools
 import shutil
+import bisect
+import zipfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Iterable, Iterator, List, TextIO
 import aiofiles
 from docx import Document
 from docx.shared import RGBColor
 import asyncio
 
-os.makedirs("uploads", exist_ok=True)
-os.makedirs("static/ads", exist_ok=True)
+import config
+import tracing
+from tracing import span
+
+TEXT_EXTENSIONS = {".txt"}
+DOCX_EXTENSIONS = {".docx"}
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # characters per streamed text chunk
+STREAM_WRITE_SIZE = 64 * 1024  # characters per response chunk of convert_text_stream
+
+LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "lexicon.tsv")
+WORD_CACHE_SIZE = 50000  # words kept in the conversion memo (per direction)
+
+
+class ConversionCancelled(Exception):
+    """
+    Raised inside a conversion when its cancel event is set
+    """
+
+
+def check_cancelled(cancel_event: Optional[threading.Event]):
+
+    if cancel_event is not None and cancel_event.is_set():
+        raise ConversionCancelled()
+
+
+class Lexicon:
+
+    # Exception words as two sorted arrays per direction, looked up with bisect
+    def __init__(self, pairs: Iterable[Tuple[str, str]] = ()):
+        self.pairs = list(pairs)
+        pairs = self.pairs
+        self.cyrillic_keys, self.latin_values = self._sorted(pairs)
+        self.latin_keys, self.cyrillic_values = self._sorted((latin, cyrillic) for cyrillic, latin in pairs)
+    
+    @staticmethod
+    def _sorted(pairs):
+        items = sorted(dict(pairs).items())
+        return [key for key, _ in items], [value for _, value in items]
+    
+    @classmethod
+    def load(cls, path: str = LEXICON_PATH) -> "Lexicon":
+        
+        pairs = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    cyrillic, latin = line.split("\t")
+                    pairs.append((cyrillic.strip(), latin.strip()))
+        except FileNotFoundError:
+            pass
+        return cls(pairs)
+    
+    @staticmethod
+    def _find(keys, values, word: str) -> Optional[str]:
+        index = bisect.bisect_left(keys, word)
+        if index < len(keys) and keys[index] == word:
+            return values[index]
+        return None
+    
+    def to_latin(self, word: str) -> Optional[str]:
+        return self._find(self.cyrillic_keys, self.latin_values, word)
+    
+    def to_cyrillic(self, word: str) -> Optional[str]:
+        return self._find(self.latin_keys, self.cyrillic_values, word)
 
 
 class UzbekConverter:
@@ -88,6 +162,18 @@ class UzbekConverter:
         ("Z", "З"),
     ]
     
+    # Marks removed before Latin -> Cyrillic conversion
+    STRIPPED_MARKS = ("'", "`", "‘", "’")
+    
+    CYRILLIC_PATTERN = r'[а-яёўғҳқА-ЯЁЎҒҲҚ]'
+    LATIN_PATTERN = r'[a-zA-Z]'
+    
+    # Words are runs of letters, joined by apostrophes (o‘zbek, ma'no)
+    WORD_PATTERN = r"[a-zA-Z\u0400-\u04FF]+(?:['`‘’][a-zA-Z\u0400-\u04FF]+)*"
+    CYRILLIC_VOWELS = "аеёиоуўэюя"
+    
+    LEXICON = Lexicon.load()
+    
     CYRILLIC_TO_LATIN = [
         ("нг", "ng"),
         ("ў", "o'"),
@@ -160,10 +246,10 @@ class UzbekConverter:
     @staticmethod
     def detect_alphabet(text: str) -> str:
 
-        cyrillic_chars = re.findall(r'[а-яёўғҳқА-ЯЁЎҒҲҚ]', text)
+        cyrillic_chars = re.findall(UzbekConverter.CYRILLIC_PATTERN, text)
         cyrillic_count = len(cyrillic_chars)
 
-        latin_chars = re.findall(r'[a-zA-Z]', text)
+        latin_chars = re.findall(UzbekConverter.LATIN_PATTERN, text)
         latin_count = len(latin_chars)
         
         if cyrillic_count > latin_count:
@@ -174,7 +260,8 @@ class UzbekConverter:
     @staticmethod
     def latin_to_cyrillic(text: str) -> str:
 
-        text = text.replace("'", "").replace("`", "").replace("‘", "").replace("’", "")
+        for mark in UzbekConverter.STRIPPED_MARKS:
+            text = text.replace(mark, "")
         
         for latin, cyrillic in UzbekConverter.LATIN_TO_CYRILLIC:
             text = text.replace(latin, cyrillic)
@@ -190,21 +277,289 @@ class UzbekConverter:
         return text
     
     @staticmethod
-    def convert_text(text: str) -> Tuple[str, str]:
+    def resolve_direction(text: str, direction: str = "auto") -> str:
+
+        if direction in ("latin_to_cyrillic", "cyrillic_to_latin"):
+            return direction
+        if UzbekConverter.detect_alphabet(text) == 'latin':
+            return "latin_to_cyrillic"
+        return "cyrillic_to_latin"
+    
+    @staticmethod
+    def convert(text: str, direction: str) -> str:
+
+        return UzbekConverter.convert_words(text, direction)
+    
+    @staticmethod
+    def convert_words(text: str, direction: str) -> str:
+
+        # Each word goes through the memo; text between words is kept as is
+        memo = _word_memo(direction)
+        converted, words = _WORD_RE.subn(lambda match: memo[match.group()], text)
+        memo.lookups += words
+        if direction == "latin_to_cyrillic":
+            for mark in UzbekConverter.STRIPPED_MARKS:
+                converted = converted.replace(mark, "")
+        return converted
+    
+    @staticmethod
+    def word_cache_stats() -> dict:
+
+        lookups = sum(memo.lookups for memo in _WORD_MEMOS.values())
+        misses = sum(memo.misses for memo in _WORD_MEMOS.values())
+        return {
+            "hits": lookups - misses,
+            "misses": misses,
+            "size": sum(len(memo) for memo in _WORD_MEMOS.values()),
+            "max_size": sum(memo.max_size for memo in _WORD_MEMOS.values()),
+            "hit_rate": round((lookups - misses) / lookups, 4) if lookups else 0.0
+        }
+    
+    @staticmethod
+    def export_word_memo() -> dict:
+
+        # {direction: [[word, converted], ...]} oldest first, for warm starts
+        return {direction: [list(item) for item in list(memo.items())] for direction, memo in _WORD_MEMOS.items()}
+    
+    @staticmethod
+    def load_word_memo(entries: dict) -> int:
+
+        loaded = 0
+        for direction, items in entries.items():
+            memo = _WORD_MEMOS.get(direction)
+            if memo is not None:
+                memo.preload(items)
+                loaded += len(items)
+        return loaded
+    
+    @staticmethod
+    def convert_text(text: str, cancel_event: Optional[threading.Event] = None) -> Tuple[str, str]:
 
         if not text.strip():
             return text, "none"
         
-        alphabet = UzbekConverter.detect_alphabet(text)
-        
-        if alphabet == 'latin':
-            converted = UzbekConverter.latin_to_cyrillic(text)
-            direction = "latin_to_cyrillic"
+        direction = UzbekConverter.resolve_direction(text)
+        return convert_parallel(text, direction, cancel_event), direction
+
+
+_WORD_RE = re.compile(UzbekConverter.WORD_PATTERN)
+_MARKS = "".join(UzbekConverter.STRIPPED_MARKS)
+_SEPARATED_SH_RE = re.compile(f"([sS])[{_MARKS}]([hH])")
+_O_G_MARK_RE = re.compile(f"([oOgG])[{_MARKS}]")
+_INNER_MARK_RE = re.compile(f"[{_MARKS}]")
+
+_LATIN_SPECIALS = {"s": "с", "S": "С", "h": "ҳ", "H": "Ҳ", "o": "ў", "O": "Ў", "g": "ғ", "G": "Ғ"}
+
+
+def _match_case(source: str, converted: str) -> str:
+
+    if len(source) > 1 and source.isupper():
+        return converted.upper()
+    if source[:1].isupper():
+        return converted[:1].upper() + converted[1:]
+    return converted
+
+
+def _word_to_latin(word: str) -> str:
+
+    lower = word.lower()
+    exception = UzbekConverter.LEXICON.to_latin(lower)
+    if exception is not None:
+        return _match_case(word, exception)
+    
+    # Context rules the character table cannot express
+    parts = []
+    previous = ""
+    for char in word:
+        current = char.lower()
+        if current == "е":
+            latin = "ye" if not previous or previous in UzbekConverter.CYRILLIC_VOWELS else "e"
+        elif current == "ц":
+            latin = "ts" if previous and previous in UzbekConverter.CYRILLIC_VOWELS else "s"
+        elif current == "ь":
+            latin = ""
+        elif current == "ъ":
+            latin = "'"
+        elif current == "э":
+            latin = "e"
         else:
-            converted = UzbekConverter.cyrillic_to_latin(text)
-            direction = "cyrillic_to_latin"
-        
-        return converted, direction
+            parts.append(char)
+            previous = current
+            continue
+        if char.isupper():
+            latin = latin.upper() if len(word) > 1 and word.isupper() else latin.capitalize()
+        parts.append(latin)
+        previous = current
+    return UzbekConverter.cyrillic_to_latin("".join(parts))
+
+
+def _word_to_cyrillic(word: str) -> str:
+
+    lower = _INNER_MARK_RE.sub("'", word.lower())
+    exception = UzbekConverter.LEXICON.to_cyrillic(lower)
+    if exception is not None:
+        return _match_case(word, exception)
+    
+    # s'h keeps s and h apart, o'/g' are letters, any other inner mark is ъ
+    word = _SEPARATED_SH_RE.sub(lambda m: _LATIN_SPECIALS[m.group(1)] + _LATIN_SPECIALS[m.group(2)], word)
+    word = _O_G_MARK_RE.sub(lambda m: _LATIN_SPECIALS[m.group(1)], word)
+    word = _INNER_MARK_RE.sub("ъ", word)
+    if word[0] in "eE":
+        word = ("Э" if word[0] == "E" else "э") + word[1:]
+    return UzbekConverter.latin_to_cyrillic(word)
+
+
+class _WordMemo(dict):
+
+    # word -> converted word for one direction. A miss converts and stores;
+    # when full, the older half is dropped (insertion order). Plain dict
+    # lookups are cheaper than lru_cache and the entries can be exported.
+    def __init__(self, convert_word, max_size: int):
+        super().__init__()
+        self.convert_word = convert_word
+        self.max_size = max_size
+        self.lookups = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def __missing__(self, word: str) -> str:
+        self.misses += 1
+        if len(self) >= self.max_size:
+            self._evict()
+        converted = self[word] = self.convert_word(word)
+        return converted
+    
+    def _evict(self):
+        with self._lock:
+            if len(self) >= self.max_size:
+                kept = list(self.items())[len(self) // 2:]
+                self.clear()
+                self.update(kept)
+    
+    def preload(self, items):
+        for word, converted in items[-self.max_size:]:
+            self[word] = converted
+
+
+_WORD_MEMOS = {
+    "latin_to_cyrillic": _WordMemo(_word_to_cyrillic, WORD_CACHE_SIZE),
+    "cyrillic_to_latin": _WordMemo(_word_to_latin, WORD_CACHE_SIZE),
+}
+
+
+def _word_memo(direction: str) -> _WordMemo:
+
+    return _WORD_MEMOS["latin_to_cyrillic" if direction == "latin_to_cyrillic" else "cyrillic_to_latin"]
+
+
+_process_pool = None
+_WHITESPACE_RE = re.compile(r"\s")
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+
+    global _process_pool
+    if _process_pool is None:
+        # Forking a threaded server process can copy held locks into the child
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _process_pool = ProcessPoolExecutor(
+            max_workers=config.PARALLEL_WORKERS,
+            mp_context=multiprocessing.get_context(method)
+        )
+    return _process_pool
+
+
+def shutdown_process_pool():
+
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def split_segments(text: str, segment_size: int) -> List[str]:
+
+    # Cut at paragraph breaks when possible, otherwise at any whitespace,
+    # so no word (and no digraph like "sh" or "g‘") is split
+    segments = []
+    start = 0
+    while start < len(text):
+        end = start + segment_size
+        if end >= len(text):
+            segments.append(text[start:])
+            break
+        cut = text.rfind("\n", start + segment_size // 2, end)
+        if cut == -1:
+            cut = max(text.rfind(" ", start, end), text.rfind("\t", start, end))
+        if cut == -1:
+            match = _WHITESPACE_RE.search(text, end)
+            cut = match.start() if match else len(text) - 1
+        segments.append(text[start:cut + 1])
+        start = cut + 1
+    return segments
+
+
+def _convert_segments(
+    segments: List[str],
+    direction: str,
+    cancel_event: Optional[threading.Event] = None
+) -> List[str]:
+
+    converted = []
+    for segment in segments:
+        check_cancelled(cancel_event)
+        if segment.strip():
+            segment = UzbekConverter.convert(segment, UzbekConverter.resolve_direction(segment, direction))
+        converted.append(segment)
+    return converted
+
+
+def convert_segments(
+    segments: List[str],
+    direction: str = "auto",
+    cancel_event: Optional[threading.Event] = None
+) -> List[str]:
+
+    # Small inputs stay on the current core, large ones are spread over the pool
+    total = sum(len(segment) for segment in segments)
+    if total < config.PARALLEL_THRESHOLD_CHARS or config.PARALLEL_WORKERS < 2:
+        return _convert_segments(segments, direction, cancel_event)
+    
+    batches, batch, batch_size = [], [], 0
+    for segment in segments:
+        batch.append(segment)
+        batch_size += len(segment)
+        if batch_size >= config.PARALLEL_SEGMENT_CHARS:
+            batches.append(batch)
+            batch, batch_size = [], 0
+    if batch:
+        batches.append(batch)
+    
+    pool = get_process_pool()
+    futures = [pool.submit(_convert_segments, batch, direction) for batch in batches]
+    converted = []
+    try:
+        for future in futures:
+            check_cancelled(cancel_event)
+            converted.extend(future.result())
+    finally:
+        # Drop batches still queued when cancelled or failed
+        for future in futures:
+            future.cancel()
+    return converted
+
+
+def convert_parallel(
+    text: str,
+    direction: str,
+    cancel_event: Optional[threading.Event] = None
+) -> str:
+
+    if len(text) < config.PARALLEL_THRESHOLD_CHARS:
+        check_cancelled(cancel_event)
+        return UzbekConverter.convert(text, direction)
+    segments = split_segments(text, config.PARALLEL_SEGMENT_CHARS)
+    return "".join(convert_segments(segments, direction, cancel_event))
 
 
 class DocxConverter:
@@ -223,26 +578,26 @@ class DocxConverter:
         return filepath
     
     @staticmethod
-    def convert_docx_file(input_path: str, output_path: str, direction: str = "auto"):
+    def convert_docx_file(
+        input_path: str,
+        output_path: str,
+        direction: str = "auto",
+        cancel_event: Optional[threading.Event] = None
+    ):
 
-        doc = Document(input_path)
+        check_cancelled(cancel_event)
+        with span("docx.parse"):
+            doc = Document(input_path)
         
-        # Process all paragraphs
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                # Convert paragraph text
-                if direction == "latin_to_cyrillic":
-                    converted_text = UzbekConverter.latin_to_cyrillic(paragraph.text)
-                elif direction == "cyrillic_to_latin":
-                    converted_text = UzbekConverter.cyrillic_to_latin(paragraph.text)
-                else:
-
-                    alphabet = UzbekConverter.detect_alphabet(paragraph.text)
-                    if alphabet == 'latin':
-                        converted_text = UzbekConverter.latin_to_cyrillic(paragraph.text)
-                    else:
-                        converted_text = UzbekConverter.cyrillic_to_latin(paragraph.text)
-                
+        # Convert all paragraph texts (auto detects per paragraph, in
+        # parallel for very large documents)
+        with span("docx.convert"):
+            paragraphs = [paragraph for paragraph in doc.paragraphs if paragraph.text.strip()]
+            converted_texts = convert_segments([paragraph.text for paragraph in paragraphs], direction, cancel_event)
+        
+        with span("docx.replace_runs"):
+            for paragraph, converted_text in zip(paragraphs, converted_texts):
+                check_cancelled(cancel_event)
                 paragraph.clear()
                 run = paragraph.add_run(converted_text)
                 
@@ -254,32 +609,50 @@ class DocxConverter:
                     run.font.size = original_run.font.size
                     run.font.name = original_run.font.name
         
-        doc.save(output_path)
+        check_cancelled(cancel_event)
+        with span("docx.save"):
+            doc.save(output_path)
     
     @staticmethod
     async def convert_docx(
         file_content: bytes, 
         original_filename: str,
-        direction: str = "auto"
+        direction: str = "auto",
+        cancel_event: Optional[threading.Event] = None
     ) -> Tuple[Optional[str], Optional[str], str]:
 
+        input_path = output_path = None
         try:
 
             if not original_filename.lower().endswith('.docx'):
                 return None, None, "Faqat .docx fayllarni yuklash mumkin"
 
-            input_path = await DocxConverter.save_uploaded_file(file_content, original_filename)
+            with span("save_uploaded_file"):
+                input_path = await DocxConverter.save_uploaded_file(file_content, original_filename)
             
             file_id = str(uuid.uuid4())
             output_filename = f"converted_{file_id}.docx"
             output_path = os.path.join("uploads", output_filename)
             
-            DocxConverter.convert_docx_file(input_path, output_path, direction)
+            # Runs in a worker thread so the event loop can watch for
+            # disconnects and deadlines; cancel_event stops it per paragraph
+            await tracing.to_thread(
+                DocxConverter.convert_docx_file, input_path, output_path, direction, cancel_event
+            )
             
             return input_path, output_path, file_id
             
+        except ConversionCancelled:
+            # Nobody will download a cancelled result: drop partial files
+            if output_path:
+                DocxConverter.cleanup_file(output_path)
+            raise
         except Exception as e:
             return None, None, f"DOCX konvertatsiyada xatolik: {str(e)}"
+        finally:
+            # The uploaded source is not kept once the conversion is over
+            if input_path:
+                DocxConverter.cleanup_file(input_path)
     
     @staticmethod
     def cleanup_file(filepath: str):
@@ -291,6 +664,281 @@ class DocxConverter:
                 pass
 
 
+class _ZipSink:
+
+    # Write-only buffer for zipfile; drained after every chunk so an archive
+    # of any size is streamed with bounded memory (no seek: data descriptors)
+    def __init__(self):
+        self._buffer = bytearray()
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ZipStreamWriter:
+
+    def __init__(self, chunk_size: int = 256 * 1024):
+        self.chunk_size = chunk_size
+        self._sink = _ZipSink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._names = set()
+    
+    def _unique_name(self, name: str) -> str:
+        base, extension = os.path.splitext(name)
+        candidate, counter = name, 1
+        while candidate in self._names:
+            counter += 1
+            candidate = f"{base} ({counter}){extension}"
+        self._names.add(candidate)
+        return candidate
+    
+    def add_file(self, filepath: str, name: str) -> Iterator[bytes]:
+        
+        with open(filepath, "rb") as src, self._zip.open(self._unique_name(name), "w") as entry:
+            for block in iter(lambda: src.read(self.chunk_size), b""):
+                entry.write(block)
+                data = self._sink.drain()
+                if data:
+                    yield data
+        yield self._sink.drain()
+    
+    def add_text(self, name: str, text: str) -> bytes:
+        
+        self._zip.writestr(self._unique_name(name), text.encode("utf-8"))
+        return self._sink.drain()
+    
+    def close(self) -> bytes:
+        
+        self._zip.close()
+        return self._sink.drain()
+
+
+def iter_text_chunks(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+
+    # Chunks end on whitespace so digraphs like "sh" or "g‘" are never split
+    tail = ""
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            break
+        block = tail + block
+        cut = max(block.rfind(" "), block.rfind("\n"), block.rfind("\t"))
+        if cut == -1:
+            tail = block
+            continue
+        tail = block[cut + 1:]
+        yield block[:cut + 1]
+    if tail:
+        yield tail
+
+
+def convert_text_chunks(chunks: Iterable[str], direction: str = "auto") -> Iterator[str]:
+
+    # Auto direction is detected once, from the first chunk containing letters
+    resolved = None if direction == "auto" else direction
+    for chunk in chunks:
+        if resolved is None:
+            if not chunk.strip():
+                yield chunk
+                continue
+            resolved = UzbekConverter.resolve_direction(chunk)
+        yield UzbekConverter.convert(chunk, resolved)
+
+
+def convert_text_file(
+    input_path: str,
+    output_path: str,
+    direction: str = "auto",
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+):
+
+    # UTF-8 (with or without BOM), UTF-16 and legacy Windows code pages are read;
+    # the output is always UTF-8
+    with open(input_path, "rb") as f:
+        encoding, _ = detect_encoding(f.read(config.TEXT_STREAM_CHUNK))
+    with open(input_path, "r", encoding=encoding, newline="") as src, \
+            open(output_path, "w", encoding="utf-8", newline="") as dst:
+        for converted in convert_text_chunks(iter_text_chunks(src, chunk_size), direction):
+            dst.write(converted)
+
+
+def detect_encoding(sample: bytes) -> Tuple[str, bool]:
+
+    # Returns (encoding, has_bom); legacy files are Windows Cyrillic or Latin
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig", True
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16", True
+    try:
+        # Not final: the sample may end in the middle of a character
+        codecs.getincrementaldecoder("utf-8")().decode(sample)
+        return "utf-8", False
+    except UnicodeDecodeError:
+        pass
+    high_bytes = [byte for byte in sample if byte >= 0x80]
+    cyrillic_letters = [byte for byte in high_bytes if byte >= 0xC0 or byte in (0xA1, 0xA2, 0xA8, 0xB8)]
+    if len(cyrillic_letters) > len(high_bytes) * 0.7:
+        return "cp1251", False
+    return "cp1252", False
+
+
+def iter_decoded_lines(
+    byte_chunks: Iterable[bytes],
+    encoding: str,
+    max_line: Optional[int] = None
+) -> Iterator[str]:
+
+    # Lines keep their "\n"; lines longer than max_line are cut at whitespace
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    tail = ""
+    for chunk in byte_chunks:
+        text = tail + decoder.decode(chunk)
+        start = 0
+        while True:
+            end = text.find("\n", start)
+            if end == -1:
+                break
+            yield text[start:end + 1]
+            start = end + 1
+        tail = text[start:]
+        if max_line is not None and len(tail) > max_line:
+            cut = max(tail.rfind(" "), tail.rfind("\t"))
+            if cut != -1:
+                yield tail[:cut + 1]
+                tail = tail[cut + 1:]
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _group_lines(lines: Iterable[str], size: int) -> Iterator[str]:
+
+    group, group_size = [], 0
+    for line in lines:
+        group.append(line)
+        group_size += len(line)
+        if group_size >= size:
+            yield "".join(group)
+            group, group_size = [], 0
+    if group:
+        yield "".join(group)
+
+
+# Subtitle index and timing lines, and inline tags like <i> or {\an8}
+_SRT_TIMING_RE = re.compile(r"^\s*\d{1,2}:\d{2}:\d{2}[,.]\d{1,3}\s*-->")
+_SRT_TAG_RE = re.compile(r"(<[^>]*>|\{[^}]*\})")
+
+# CSV fields that must keep their Latin letters
+_URL_OR_EMAIL_RE = re.compile(r"^\s*(?:[a-z][a-z0-9+.-]*://\S*|www\.\S*|[^@\s]+@[^@\s]+\.[a-z]{2,})\s*$", re.IGNORECASE)
+
+
+def convert_srt_lines(lines: Iterable[str], direction: str) -> Iterator[str]:
+
+    for line in lines:
+        if line.strip().isdigit() or _SRT_TIMING_RE.match(line):
+            yield line
+            continue
+        parts = _SRT_TAG_RE.split(line)
+        parts[::2] = [UzbekConverter.convert(part, direction) for part in parts[::2]]
+        yield "".join(parts)
+
+
+def convert_csv_lines(lines: Iterable[str], direction: str, sample: str) -> Iterator[str]:
+
+    # Delimiter and quoting are sniffed from the sample and written back the same way
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, dialect, lineterminator="\r\n" if "\r\n" in sample else "\n")
+    for row in csv.reader(lines, dialect):
+        writer.writerow([
+            field if _URL_OR_EMAIL_RE.match(field) else UzbekConverter.convert(field, direction)
+            for field in row
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _count_chars(lines: Iterable[str], stats: Optional[dict]) -> Iterator[str]:
+
+    if stats is None:
+        yield from lines
+        return
+    for line in lines:
+        stats["chars"] = stats.get("chars", 0) + len(line)
+        yield line
+
+
+def convert_text_stream(
+    byte_chunks: Iterable[bytes],
+    extension: str,
+    direction: str = "auto",
+    stats: Optional[dict] = None
+) -> Iterator[bytes]:
+
+    # bytes in -> UTF-8 bytes out; only one line (or CSV record) is held at a time.
+    # The first chunk decides the encoding and, for "auto", the direction.
+    # stats["chars"] counts the decoded input characters converted so far
+    byte_chunks = iter(byte_chunks)
+    sample = next(byte_chunks, b"")
+    encoding, has_bom = detect_encoding(sample)
+    text_sample = sample.decode(encoding, errors="ignore")
+    if direction == "auto":
+        direction = UzbekConverter.resolve_direction(text_sample)
+    
+    chunks = itertools.chain([sample], byte_chunks)
+    if extension == ".srt":
+        converted = convert_srt_lines(_count_chars(iter_decoded_lines(chunks, encoding), stats), direction)
+    elif extension == ".csv":
+        complete_lines = text_sample[:text_sample.rfind("\n") + 1] or text_sample
+        converted = convert_csv_lines(_count_chars(iter_decoded_lines(chunks, encoding), stats), direction, complete_lines)
+    else:
+        lines = _count_chars(iter_decoded_lines(chunks, encoding, max_line=DEFAULT_CHUNK_SIZE), stats)
+        converted = (UzbekConverter.convert(group, direction) for group in _group_lines(lines, STREAM_WRITE_SIZE))
+    
+    if has_bom:
+        yield codecs.BOM_UTF8
+    for group in _group_lines(converted, STREAM_WRITE_SIZE):
+        yield group.encode("utf-8")
+
+
+def convert_file(
+    input_path: str,
+    output_path: str,
+    direction: str = "auto",
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+):
+
+    extension = os.path.splitext(input_path)[1].lower()
+    if extension not in DOCX_EXTENSIONS | TEXT_EXTENSIONS:
+        raise ValueError(f"Qo'llab-quvvatlanmaydigan fayl turi: {extension}")
+    
+    # Written next to the output and moved into place only when complete,
+    # so a failed conversion never leaves a partial file behind
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        if extension in DOCX_EXTENSIONS:
+            DocxConverter.convert_docx_file(input_path, tmp_path, direction)
+        else:
+            convert_text_file(input_path, tmp_path, direction, chunk_size)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        DocxConverter.cleanup_file(tmp_path)
+        raise
+
+
 async def cleanup_old_files():
 
     while True:
@@ -300,7 +948,7 @@ async def cleanup_old_files():
                 filepath = os.path.join("uploads", filename)
                 if os.path.isfile(filepath):
                     mtime = datetime.fromtimestamp(os.path.getmtime(filepath))
-                    if (now - mtime).total_seconds() > 15:
+                    if (now - mtime).total_seconds() > config.FILE_RETENTION:
                         try:
                             os.remove(filepath)
                         except:
@@ -308,20 +956,7 @@ async def cleanup_old_files():
         except:
             pass
         
-        await asyncio.sleep(10)
-
-
-async def save_ad_image(file_content: bytes, filename: str) -> str:
-
-    file_id = str(uuid.uuid4())
-    extension = os.path.splitext(filename)[1] or ".png"
-    new_filename = f"ad_{file_id}{extension}"
-    filepath = os.path.join("static", "ads", new_filename)
-    
-    async with aiofiles.open(filepath, "wb") as f:
-        await f.write(file_content)
-    
-    return f"/static/ads/{new_filename}"
+        await asyncio.sleep(config.FILE_CLEANUP_INTERVAL)
 
 
 def get_file_size(filepath: str) -> int:
@@ -3,9 +3,17 @@ database.py - SQLite database models and utilities for Latinify
 """
 
 import os
+import json
+import time
+import base64
+import re
+import secrets
+import ipaddress
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Text
+from datetime import timedelta
+from sqlalchemy import create_engine, event, inspect, text, and_, or_, Index, Column, Integer, SmallInteger, String, Boolean, DateTime, Text, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
 
 # Create database directory if not exists
@@ -21,6 +29,20 @@ engine = create_engine(
     echo=False  # Set to True for debugging SQL
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Allow several worker processes to share the SQLite file
+    """
+    cursor = dbapi_connection.cursor()
+    # Takes effect for new databases; existing ones are converted by retention.py
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -35,17 +57,25 @@ class Advertisement(Base):
     __tablename__ = "ads"
     
     id = Column(Integer, primary_key=True, index=True)
-    image_path = Column(String(500), nullable=False)  # Path to uploaded image
+    image_path = Column(String(500), nullable=False)  # Path to uploaded image (largest JPEG)
+    image_variants = Column(Text, nullable=True)  # JSON {"webp": [{"url", "width"}], "jpeg": [...]}
     title_text = Column(String(200), nullable=False)  # Text under image
     redirect_url = Column(String(500), nullable=False)  # URL to redirect on click
     active = Column(Boolean, default=True)  # Is ad active?
     display_delay_seconds = Column(Integer, default=5)  # Delay before showing ad
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Admin list pages walk (created_at, id) newest first
+    __table_args__ = (Index("ix_ads_created_at_id", "created_at", "id"),)
+    
+    def get_image_variants(self):
+        return json.loads(self.image_variants) if self.image_variants else None
+    
     def to_dict(self):
         return {
             "id": self.id,
             "image_path": self.image_path,
+            "image_variants": self.get_image_variants(),
             "title_text": self.title_text,
             "redirect_url": self.redirect_url,
             "active": self.active,
@@ -71,18 +101,112 @@ class Settings(Base):
         }
 
 
+# Integer codes stored in ConversionLog.type_code (never renumber)
+CONVERSION_TYPES = {"other": 0, "text": 1, "docx": 2, "file": 3}
+CONVERSION_TYPE_NAMES = {code: name for name, code in CONVERSION_TYPES.items()}
+
+
 class ConversionLog(Base):
     """
-    Optional logging for conversions
+    Optional logging for conversions (compact rows, old ones are archived)
+
+    conversion_type, ip_address and timestamp are kept as properties so
+    rows are created and read like the original string-based schema.
     """
-    __tablename__ = "conversion_logs"
+    __tablename__ = "conversion_events"
     
-    id = Column(Integer, primary_key=True, index=True)
-    conversion_type = Column(String(20), nullable=False)  # 'text' or 'docx'
+    id = Column(Integer, primary_key=True)
+    type_code = Column(SmallInteger, nullable=False, default=0)  # See CONVERSION_TYPES
     text_length = Column(Integer, default=0)  # Character count for text conversions
     file_name = Column(String(255), nullable=True)  # Original filename for docx
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    ip_address = Column(String(45), nullable=True)  # Client IP (optional)
+    ts = Column(Integer, nullable=False, default=lambda: int(time.time()), index=True)  # Unix seconds, UTC
+    ip = Column(LargeBinary(16), nullable=True)  # Packed IPv4 (4 bytes) or IPv6 (16 bytes)
+    
+    # Admin log pages walk (ts, id) newest first, optionally within one
+    # type or IP; the ts index above serves the unfiltered walk
+    __table_args__ = (
+        Index("ix_conversion_events_type_ts_id", "type_code", "ts", "id"),
+        Index("ix_conversion_events_ip_ts_id", "ip", "ts", "id"),
+    )
+    
+    @property
+    def conversion_type(self):
+        return CONVERSION_TYPE_NAMES.get(self.type_code, "other")
+    
+    @conversion_type.setter
+    def conversion_type(self, value):
+        self.type_code = CONVERSION_TYPES.get(value, 0)
+    
+    @property
+    def ip_address(self):
+        return str(ipaddress.ip_address(self.ip)) if self.ip else None
+    
+    @ip_address.setter
+    def ip_address(self, value):
+        try:
+            self.ip = ipaddress.ip_address(value).packed if value else None
+        except ValueError:
+            self.ip = None
+    
+    @property
+    def timestamp(self):
+        return datetime.utcfromtimestamp(self.ts)
+    
+    @timestamp.setter
+    def timestamp(self, value):
+        # Naive datetimes are UTC, like datetime.utcnow() elsewhere
+        self.ts = int((value - datetime(1970, 1, 1)).total_seconds())
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "type": self.conversion_type,
+            "text_length": self.text_length,
+            "file_name": self.file_name,
+            "timestamp": self.timestamp.isoformat(),
+            "ip": self.ip_address
+        }
+
+
+class Counter(Base):
+    """
+    Named integer counters shared by all worker processes
+    """
+    __tablename__ = "counters"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, default=0)
+
+
+# secrets.token_urlsafe(16), as issued in the session_id cookie
+SESSION_ID_RE = re.compile(r"[A-Za-z0-9_-]{22}")
+
+
+class UserSession(Base):
+    """
+    Visitor session shared by all worker processes
+    """
+    __tablename__ = "user_sessions"
+    
+    id = Column(String(32), primary_key=True)  # Value of the session_id cookie
+    shown_ads = Column(Text, default="")  # Comma separated ad ids
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def get_shown_ads(self):
+        return [int(ad_id) for ad_id in (self.shown_ads or "").split(",") if ad_id]
+
+
+class ConversionJob(Base):
+    """
+    Converted file waiting to be downloaded (any worker may serve it)
+    """
+    __tablename__ = "conversion_jobs"
+    
+    file_id = Column(String(36), primary_key=True)
+    status = Column(String(20), default="pending")  # 'pending', 'done' or 'failed'
+    output_path = Column(String(500), nullable=True)  # Path under uploads/
+    original_filename = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 
 # Create all tables
@@ -91,6 +215,8 @@ def init_db():
     Initialize database and create tables
     """
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    add_missing_indexes()
     
     # Create default settings if not exists
     db = SessionLocal()
@@ -109,6 +235,30 @@ def init_db():
         db.close()
 
 
+def add_missing_columns():
+    """
+    Add columns introduced after a table was created (create_all skips them)
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def add_missing_indexes():
+    """
+    Create indexes introduced after a table was created (create_all skips them)
+    """
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
 # Dependency to get DB session
 def get_db():
     """
@@ -157,5 +307,183 @@ def get_settings(db):
     return settings
 
 
+def get_or_create_session(db, session_id):
+    """
+    Get visitor session by id or create a new one
+    """
+    session = None
+    if session_id and SESSION_ID_RE.fullmatch(session_id):
+        session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    else:
+        # Only ids shaped like the ones we issue are accepted from cookies
+        session_id = secrets.token_urlsafe(16)
+    if not session:
+        # Cookies are issued without a database round trip, rows are created lazily
+        session = UserSession(id=session_id, shown_ads="")
+        db.add(session)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent first request with the same cookie created the row
+            db.rollback()
+            session = db.query(UserSession).filter(UserSession.id == session_id).one()
+    return session
+
+
+def mark_ad_shown(db, session, ad_id):
+    """
+    Remember that the visitor has seen an advertisement
+    """
+    shown_ads = session.get_shown_ads()
+    if ad_id not in shown_ads:
+        shown_ads.append(ad_id)
+        session.shown_ads = ",".join(str(shown_id) for shown_id in shown_ads)
+        db.commit()
+
+
+def delete_expired_sessions(db, max_age_seconds):
+    """
+    Remove visitor sessions older than max_age_seconds
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    deleted = db.query(UserSession).filter(UserSession.created_at < cutoff).delete()
+    db.commit()
+    return deleted
+
+
+def save_job(db, file_id, status, output_path=None, original_filename=None):
+    """
+    Create or update conversion job status
+    """
+    job = db.query(ConversionJob).filter(ConversionJob.file_id == file_id).first()
+    if not job:
+        job = ConversionJob(file_id=file_id)
+        db.add(job)
+    job.status = status
+    if output_path is not None:
+        job.output_path = output_path
+    if original_filename is not None:
+        job.original_filename = original_filename
+    db.commit()
+    return job
+
+
+def get_job(db, file_id):
+    """
+    Get conversion job by file id
+    """
+    return db.query(ConversionJob).filter(ConversionJob.file_id == file_id).first()
+
+
+def delete_job(db, file_id):
+    """
+    Remove a conversion job
+    """
+    db.query(ConversionJob).filter(ConversionJob.file_id == file_id).delete()
+    db.commit()
+
+
+def get_counter(db, name):
+    """
+    Get the value of a named counter (0 if it was never incremented)
+    """
+    counter = db.query(Counter).filter(Counter.name == name).first()
+    return counter.value if counter else 0
+
+
+def increment_counter(db, name, delta=1):
+    """
+    Add delta to a named counter inside the caller's transaction
+    """
+    counter = db.query(Counter).filter(Counter.name == name).first()
+    if not counter:
+        counter = Counter(name=name, value=0)
+        db.add(counter)
+    counter.value += delta
+
+
+def delete_jobs_before(db, cutoff):
+    """
+    Remove conversion jobs created before cutoff
+    """
+    deleted = db.query(ConversionJob).filter(ConversionJob.created_at < cutoff).delete()
+    db.commit()
+    return deleted
+
+
+def encode_cursor(key, row_id):
+    """
+    Opaque keyset cursor for the row after which the next page starts
+    """
+    raw = json.dumps([key, row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    (key, id) of a cursor made by encode_cursor; raises ValueError
+    """
+    try:
+        key, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+    if not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise ValueError("invalid cursor")
+    return key, row_id
+
+
+def _before(key_column, id_column, key, row_id):
+    # (key, id) < (cursor key, cursor id); the leading key <= bound keeps
+    # it a plain index range scan on every backend
+    return and_(key_column <= key, or_(key_column < key, id_column < row_id))
+
+
+def get_conversion_page(db, limit, cursor=None, type_code=None, ts_from=None, ts_to=None, ip=None):
+    """
+    One page of conversion logs, newest first.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    query = db.query(ConversionLog)
+    if type_code is not None:
+        query = query.filter(ConversionLog.type_code == type_code)
+    if ip is not None:
+        query = query.filter(ConversionLog.ip == ip)
+    if ts_from is not None:
+        query = query.filter(ConversionLog.ts >= ts_from)
+    if ts_to is not None:
+        query = query.filter(ConversionLog.ts <= ts_to)
+    if cursor is not None:
+        ts, row_id = decode_cursor(cursor)
+        if not isinstance(ts, int):
+            raise ValueError("invalid cursor")
+        query = query.filter(_before(ConversionLog.ts, ConversionLog.id, ts, row_id))
+
+    rows = query.order_by(ConversionLog.ts.desc(), ConversionLog.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].ts, rows[-1].id)
+
+
+def get_ads_page(db, limit, cursor=None):
+    """
+    One page of advertisements, newest first; returns (ads, next_cursor)
+    """
+    query = db.query(Advertisement)
+    if cursor is not None:
+        created_at, row_id = decode_cursor(cursor)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except TypeError:
+            raise ValueError("invalid cursor")
+        query = query.filter(_before(Advertisement.created_at, Advertisement.id, created_at, row_id))
+
+    ads = query.order_by(Advertisement.created_at.desc(), Advertisement.id.desc()).limit(limit + 1).all()
+    if len(ads) <= limit:
+        return ads, None
+    ads = ads[:limit]
+    return ads, encode_cursor(ads[-1].created_at.isoformat(), ads[-1].id)
+
+
 # Initialize database on import
 init_db()
\ No newline at end of file
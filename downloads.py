@@ -0,0 +1,223 @@
+"""
+downloads.py - Converted file delivery with Range, conditional requests and sendfile
+"""
+
+import os
+import time
+import asyncio
+from email.utils import formatdate
+from typing import Callable, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 256 * 1024
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=" range into inclusive (start, end).
+    Returns None when the whole file should be sent (no header, multiple
+    ranges or an unknown unit) and raises RangeNotSatisfiable when the
+    range lies outside the file.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                raise RangeNotSatisfiable()
+            start = max(0, size - length)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end or start < 0:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def content_disposition(filename: str) -> str:
+    """
+    attachment header value; non-ASCII names use the RFC 5987 form
+    """
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def touch(path: str):
+    """
+    Refresh mtime so the uploads sweep treats the file as in use
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+class DownloadResponse(Response):
+    """
+    ASGI response for a finished conversion.
+
+    - Range / If-Range for resumable downloads (single range)
+    - ETag / If-None-Match; the ETag does not use mtime because the file is
+      touched while it is being served
+    - zero-copy sendfile when the server offers the zerocopysend extension
+    - on_complete is awaited after a complete 200 (full-body) transfer
+    """
+
+    def __init__(
+        self,
+        path: str,
+        filename: str,
+        etag: str,
+        last_modified: float,
+        media_type: str,
+        lease_seconds: float = 60,
+        on_complete: Optional[Callable] = None
+    ):
+        self.path = path
+        self.filename = filename
+        self.etag = etag
+        self.last_modified = formatdate(last_modified, usegmt=True)
+        self.media_type = media_type
+        self.lease_seconds = lease_seconds
+        self.on_complete = on_complete
+        self.background = None
+
+    def _headers(self, extra: dict) -> list:
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": self.etag,
+            "last-modified": self.last_modified,
+            "cache-control": "private, no-cache",
+            "content-disposition": content_disposition(self.filename),
+            **extra,
+        }
+        return [(key.encode("latin-1"), value.encode("latin-1")) for key, value in headers.items()]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            await self._send_empty(send, 404, {})
+            return
+        touch(self.path)
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and self.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            await self._send_empty(send, 304, {})
+            return
+
+        byte_range = None
+        if_range = request_headers.get("if-range")
+        if not if_range or if_range.strip() in (self.etag, self.last_modified):
+            try:
+                byte_range = parse_range(request_headers.get("range"), size)
+            except RangeNotSatisfiable:
+                await self._send_empty(send, 416, {"content-range": f"bytes */{size}"})
+                return
+
+        if byte_range is None:
+            status, start, end = 200, 0, size - 1
+            extra = {}
+        else:
+            status, (start, end) = 206, byte_range
+            extra = {"content-range": f"bytes {start}-{end}/{size}"}
+        length = end - start + 1
+        extra["content-type"] = self.media_type
+        extra["content-length"] = str(length)
+
+        await send({"type": "http.response.start", "status": status, "headers": self._headers(extra)})
+        if scope["method"] == "HEAD" or length <= 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        try:
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        except FileNotFoundError:
+            # Removed between stat and open; the client sees a short body
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        # Servers drop sends after a disconnect silently, so watch for it
+        disconnected = asyncio.Event()
+        watcher = asyncio.ensure_future(self._watch_disconnect(receive, disconnected))
+        try:
+            with file:
+                if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                    await send({
+                        "type": ZEROCOPY_EXTENSION,
+                        "file": file,
+                        "offset": start,
+                        "count": length,
+                    })
+                    completed = not disconnected.is_set()
+                else:
+                    completed = await self._send_chunks(file, start, length, send, disconnected)
+        finally:
+            watcher.cancel()
+
+        # Only a full-body transfer counts: a range reaching the last byte
+        # (e.g. bytes=-10) can arrive while the client's other ranges are pending
+        if completed and byte_range is None and self.on_complete is not None:
+            await self.on_complete()
+
+    @staticmethod
+    async def _watch_disconnect(receive: Receive, disconnected: asyncio.Event):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+                return
+
+    async def _send_chunks(self, file, start: int, length: int, send: Send, disconnected: asyncio.Event) -> bool:
+        """
+        Send [start, start + length) in chunks; returns True if all of it was sent
+        """
+        await anyio.to_thread.run_sync(file.seek, start)
+        leased_at = time.monotonic()
+        remaining = length
+        while remaining > 0:
+            if disconnected.is_set():
+                return False
+            chunk = await anyio.to_thread.run_sync(file.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+            # Keep the lease fresh on slow connections
+            if time.monotonic() - leased_at > self.lease_seconds:
+                touch(self.path)
+                leased_at = time.monotonic()
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
+            return False
+        return True
+
+    async def _send_empty(self, send: Send, status: int, extra: dict):
+        extra["content-length"] = "0"
+        await send({"type": "http.response.start", "status": status, "headers": self._headers(extra)})
+        await send({"type": "http.response.body", "body": b""})
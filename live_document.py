@@ -0,0 +1,176 @@
+"""
+live_document.py - Server-side document for incremental live conversion
+
+The document is a list of blocks cut at whitespace (split_segments), and
+each block is converted on its own. Words never span whitespace, so a
+block can be re-converted without looking at its neighbours. An edit
+re-converts only the blocks it touches, and the reply is the smallest
+patch to the converted text.
+
+Offsets in edits and patches are UTF-16 code units, the same as
+JavaScript string indices.
+"""
+
+import os
+import re
+from typing import List, Optional
+
+import config
+from converter import UzbekConverter, split_segments
+
+_CYRILLIC_RE = re.compile(UzbekConverter.CYRILLIC_PATTERN)
+_LATIN_RE = re.compile(UzbekConverter.LATIN_PATTERN)
+
+DIRECTIONS = ("latin_to_cyrillic", "cyrillic_to_latin")
+
+
+class DocumentTooLarge(ValueError):
+    pass
+
+
+def utf16_len(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def utf16_to_index(text: str, units: int) -> int:
+    """
+    Code point index of a UTF-16 offset inside text
+    """
+    if text.isascii() or utf16_len(text) == len(text):
+        return units
+    count = 0
+    for index, char in enumerate(text):
+        if count >= units:
+            return index
+        count += 2 if ord(char) > 0xFFFF else 1
+    return len(text)
+
+
+class Block:
+    """
+    One whitespace-terminated run of the source and its conversion
+    """
+
+    __slots__ = ("source", "source_units", "converted", "converted_units", "cyrillic", "latin")
+
+    def __init__(self, source: str, direction: str):
+        self.source = source
+        self.source_units = utf16_len(source)
+        self.cyrillic = len(_CYRILLIC_RE.findall(source))
+        self.latin = len(_LATIN_RE.findall(source))
+        self.convert(direction)
+
+    def convert(self, direction: str):
+        self.converted = UzbekConverter.convert(self.source, direction)
+        self.converted_units = utf16_len(self.converted)
+
+
+class LiveDocument:
+    """
+    Source and converted text of one live session.
+    An edit costs O(edit + block size) conversion work, plus a walk over
+    the block lengths.
+    """
+
+    def __init__(self, block_size: int = config.LIVE_BLOCK_CHARS, max_units: int = config.LIVE_MAX_CHARS):
+        self.block_size = block_size
+        self.max_units = max_units
+        self.requested_direction = "auto"
+        self.direction = DIRECTIONS[0]
+        self.blocks: List[Block] = []
+        self.units = 0
+        self.cyrillic = 0
+        self.latin = 0
+        self.version = 0
+
+    def _resolve_direction(self) -> str:
+        # Same rule as UzbekConverter.resolve_direction, from running counts
+        if self.requested_direction in DIRECTIONS:
+            return self.requested_direction
+        return "cyrillic_to_latin" if self.cyrillic > self.latin else "latin_to_cyrillic"
+
+    def converted_text(self) -> str:
+        return "".join(block.converted for block in self.blocks)
+
+    def reset(self, text: str, direction: str = "auto") -> str:
+        """
+        Replace the whole document; returns the converted text
+        """
+        if utf16_len(text) > self.max_units:
+            raise DocumentTooLarge("document too large")
+        self.requested_direction = direction
+        self.cyrillic = len(_CYRILLIC_RE.findall(text))
+        self.latin = len(_LATIN_RE.findall(text))
+        self.direction = self._resolve_direction()
+        self.blocks = [Block(segment, self.direction) for segment in split_segments(text, self.block_size)]
+        self.units = sum(block.source_units for block in self.blocks)
+        self.version += 1
+        return self.converted_text()
+
+    def _locate(self, offset: int):
+        """
+        (block index, block start) of the block containing offset; the end
+        of the document belongs to the last block
+        """
+        start = 0
+        for index, block in enumerate(self.blocks):
+            if offset < start + block.source_units:
+                return index, start
+            start += block.source_units
+        last = len(self.blocks) - 1
+        return last, start - (self.blocks[last].source_units if last >= 0 else 0)
+
+    def apply_edit(self, offset: int, delete: int, insert: str) -> Optional[dict]:
+        """
+        Apply an edit to the source. Returns a patch
+        {"offset", "delete", "insert"} for the converted text, or None when
+        the detected direction flipped and the whole text was re-converted.
+        """
+        if offset < 0 or delete < 0 or offset + delete > self.units:
+            raise ValueError("edit out of range")
+        if self.units - delete + utf16_len(insert) > self.max_units:
+            raise DocumentTooLarge("document too large")
+
+        first, region_start = self._locate(offset)
+        last = first if delete == 0 else self._locate(offset + delete - 1)[0]
+        first = max(first, 0)
+
+        region = "".join(block.source for block in self.blocks[first:last + 1])
+        begin = utf16_to_index(region, offset - region_start)
+        end = utf16_to_index(region, offset + delete - region_start)
+        text = region[:begin] + insert + region[end:]
+
+        # The region must end at whitespace (or the document end) so no word
+        # is cut; tiny regions are merged with the next block to keep blocks large
+        while last + 1 < len(self.blocks) and (
+            (text and not text[-1].isspace()) or len(text) < self.block_size // 4
+        ):
+            last += 1
+            text += self.blocks[last].source
+
+        old_blocks = self.blocks[first:last + 1]
+        new_blocks = [Block(segment, self.direction) for segment in split_segments(text, self.block_size)]
+        self.blocks[first:last + 1] = new_blocks
+        self.units += sum(block.source_units for block in new_blocks) - sum(block.source_units for block in old_blocks)
+        self.cyrillic += sum(block.cyrillic for block in new_blocks) - sum(block.cyrillic for block in old_blocks)
+        self.latin += sum(block.latin for block in new_blocks) - sum(block.latin for block in old_blocks)
+        self.version += 1
+
+        direction = self._resolve_direction()
+        if direction != self.direction:
+            self.direction = direction
+            for block in self.blocks:
+                block.convert(direction)
+            return None
+
+        old_converted = "".join(block.converted for block in old_blocks)
+        new_converted = "".join(block.converted for block in new_blocks)
+        prefix = len(os.path.commonprefix([old_converted, new_converted]))
+        suffix = len(os.path.commonprefix([old_converted[prefix:][::-1], new_converted[prefix:][::-1]]))
+
+        converted_start = sum(block.converted_units for block in self.blocks[:first])
+        return {
+            "offset": converted_start + utf16_len(old_converted[:prefix]),
+            "delete": utf16_len(old_converted[prefix:len(old_converted) - suffix]),
+            "insert": new_converted[prefix:len(new_converted) - suffix],
+        }
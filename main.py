@@ -4,28 +4,61 @@ Combines all routes: user API, admin panel, and static files
 """
 
 import os
+import gzip
+import json
+import base64
+import random
+import time
+import hashlib
+import ipaddress
 import secrets
 import asyncio
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 
-from fastapi import FastAPI, Request, Response, UploadFile, File, Form, Depends, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request, Response, UploadFile, File, Form, Query, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 import aiofiles
+import uvicorn
 
+import config
+import ad_images
 from database import (
-    get_db, Advertisement, Settings, ConversionLog, 
-    get_active_ads, get_random_ad, get_settings
+    get_db, SessionLocal, Advertisement, Settings, ConversionLog, 
+    get_active_ads, get_settings,
+    get_or_create_session, mark_ad_shown, delete_expired_sessions,
+    save_job, get_job, delete_job, delete_jobs_before, get_counter,
+    get_conversion_page, get_ads_page, CONVERSION_TYPES
 )
+from cancellation import RequestCancelled, CancellationMetrics, run_cancellable
+from downloads import DownloadResponse, content_disposition
+from live_document import LiveDocument, DocumentTooLarge
+from ratelimit import RateLimiter, RateLimitMiddleware
+from response_formats import FastJSONResponse, negotiate_format, encode_frames, dumps_text, FRAMES_MEDIA_TYPE, TEXT_MEDIA_TYPE
+from retention import run_retention, ARCHIVED_COUNTER
+from snapshot import write_snapshot, read_snapshot
+from static_assets import CachedStaticFiles, PathGZipMiddleware, negotiate_encoding
+from tracing import TraceBuffer, Profiler, TracingMiddleware, span
+import tracing
+from translit_js import write_translit_js
 from converter import (
-    UzbekConverter, DocxConverter, save_ad_image, 
-    get_file_size, cleanup_old_files
+    UzbekConverter, DocxConverter, 
+    get_file_size, cleanup_old_files, shutdown_process_pool, ZipStreamWriter,
+    convert_text_stream
 )
 
+# Response types of converted text files (always UTF-8)
+TEXT_FILE_MEDIA_TYPES = {
+    ".txt": "text/plain; charset=utf-8",
+    ".srt": "application/x-subrip; charset=utf-8",
+    ".csv": "text/csv; charset=utf-8",
+}
+
 # Initialize FastAPI
 app = FastAPI(title="Latinify", version="1.0.0")
 
@@ -36,11 +69,34 @@ os.makedirs("static/css", exist_ok=True)
 os.makedirs("static/ads", exist_ok=True)
 os.makedirs("uploads", exist_ok=True)
 
+# Keep the browser converter in sync with UzbekConverter rules
+try:
+    write_translit_js()
+except OSError as e:
+    # Read-only deploys ship the file generated at build time (python translit_js.py)
+    print(f"❌ translit.js could not be regenerated: {e}")
+
+# Static files (fingerprinted, cached and precompressed)
+static_files = CachedStaticFiles(directory="static")
+app.mount("/static", static_files, name="static")
+
 # Templates
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_files.url
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Compress large JSON conversion responses
+app.add_middleware(PathGZipMiddleware, paths=config.GZIP_PATHS)
+
+# Per-IP rate limiting and concurrency caps for conversion routes
+rate_limiter = RateLimiter(
+    routes=config.RATE_LIMIT_ROUTES,
+    capacity=config.RATE_LIMIT_CAPACITY,
+    refill_per_second=config.RATE_LIMIT_REFILL_PER_SECOND,
+    max_clients=config.RATE_LIMIT_MAX_CLIENTS,
+    idle_seconds=config.RATE_LIMIT_IDLE_SECONDS,
+    enabled=config.RATE_LIMIT_ENABLED
+)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 
 # CORS middleware
 app.add_middleware(
@@ -51,37 +107,258 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request phase timings and on-demand cProfile (outermost, so the
+# trace covers every other middleware)
+trace_buffer = TraceBuffer(config.TRACE_BUFFER_SIZE)
+profiler = Profiler(config.PROFILE_DIR, config.PROFILE_MAX_REQUESTS)
+app.add_middleware(TracingMiddleware, buffer=trace_buffer, profiler=profiler, paths=config.TRACE_PATHS)
+
 # Admin token (in production use environment variable)
 ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 if not ADMIN_TOKEN:
     raise RuntimeError("ADMIN_TOKEN environment variable qo‘yilmagan")
 
-# Session storage for shown ads (in production use Redis)
-user_sessions = {}
-
-# Start background cleanup task
+# Start background cleanup tasks
 @app.on_event("startup")
 async def startup_event():
+    static_files.precompress()
+    if config.SNAPSHOT_ENABLED:
+        load_warm_start()
+        asyncio.create_task(periodic_snapshot())
     asyncio.create_task(cleanup_old_files())
+    asyncio.create_task(cleanup_shared_state())
+    asyncio.create_task(conversion_log_retention())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_process_pool()
+    if config.SNAPSHOT_ENABLED:
+        try:
+            write_snapshot(config.SNAPSHOT_PATH, build_snapshot_sections())
+        except OSError as e:
+            print(f"❌ Snapshot not saved: {e}")
+
+
+async def cleanup_shared_state():
+    """
+    Periodically remove expired sessions and conversion jobs
+    """
+    while True:
+        db = SessionLocal()
+        try:
+            delete_expired_sessions(db, config.SESSION_TIMEOUT)
+            delete_jobs_before(db, datetime.utcnow() - timedelta(seconds=config.JOB_RETENTION))
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+        
+        await asyncio.sleep(config.STATE_CLEANUP_INTERVAL)
+
+
+async def conversion_log_retention():
+    """
+    Periodically archive old conversion logs and shrink the database
+    """
+    while True:
+        try:
+            result = await asyncio.to_thread(run_retention)
+            if result["drained"] or result["archived"]:
+                print(f"✅ Conversion logs: {result['drained']} migrated, {result['archived']} archived")
+        except Exception as e:
+            print(f"❌ Conversion log retention failed: {e}")
+        
+        await asyncio.sleep(config.LOG_RETENTION_INTERVAL)
+
+
+async def periodic_snapshot():
+    """
+    Periodically save warm-start state, so a crash loses little of it
+    """
+    while True:
+        await asyncio.sleep(config.SNAPSHOT_INTERVAL)
+        try:
+            await asyncio.to_thread(write_snapshot, config.SNAPSHOT_PATH, build_snapshot_sections())
+        except OSError as e:
+            print(f"❌ Snapshot not saved: {e}")
 
 
 # ======================
 # HELPER FUNCTIONS
 # ======================
 
-def get_user_session(request: Request) -> dict:
+# Cancelled conversions (deadline or client disconnect)
+cancellation_metrics = CancellationMetrics()
+
+
+def cancelled_response(route: str, cancelled: RequestCancelled) -> Response:
+    """
+    Record cancelled work and build the response (rarely seen by anyone)
+    """
+    cancellation_metrics.record(route, cancelled.reason, cancelled.elapsed)
+    if cancelled.reason == "deadline":
+        return JSONResponse({"error": "Konvertatsiya juda uzoq davom etdi"}, status_code=504)
+    return Response(status_code=499)
+
+
+# Rendered index page: {settings_version: {"etag": ..., "identity": ..., "gzip": ...}}
+index_page_cache = {}
+
+
+def get_settings_version() -> int:
+    """
+    Current settings version shared by all workers (settings file mtime)
+    """
+    try:
+        return os.stat(config.SETTINGS_VERSION_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def bump_settings_version():
+    """
+    Invalidate cached pages and ads in every worker
+    """
+    now = max(time.time_ns(), get_settings_version() + 1)
+    with open(config.SETTINGS_VERSION_FILE, "a"):
+        pass
+    os.utime(config.SETTINGS_VERSION_FILE, ns=(now, now))
+
+
+def render_index_page(version: int) -> dict:
+    """
+    Render index.html once per settings version
     """
-    Get or create user session
+    page = index_page_cache.get(version)
+    if page is not None:
+        return page
+    
+    db = SessionLocal()
+    try:
+        settings = get_settings(db)
+        body = templates.get_template("index.html").render(
+            ads_enabled=settings.ads_enabled,
+            modal_delay=settings.modal_delay_seconds
+        ).encode("utf-8")
+    finally:
+        db.close()
+    
+    page = {
+        "etag": f'"{hashlib.sha256(body).hexdigest()[:16]}"',
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=9, mtime=0)
+    }
+    index_page_cache.clear()
+    index_page_cache[version] = page
+    return page
+
+
+# Settings and active ads: {settings_version: {"ads_enabled": ..., "ads": [payload, ...]}}
+ad_snapshot_cache = {}
+
+
+def get_ad_snapshot(version: int) -> dict:
+    """
+    Settings and active ad payloads, read from the database once per settings version
+    """
+    snapshot = ad_snapshot_cache.get(version)
+    if snapshot is not None:
+        return snapshot
+    
+    db = SessionLocal()
+    try:
+        settings = get_settings(db)
+        ads = []
+        for ad in get_active_ads(db):
+            variants = ad.get_image_variants()
+            ads.append({
+                "id": ad.id,
+                "image_url": ad.image_path,
+                "srcset": ad_images.srcset(variants, "webp"),
+                "srcset_jpeg": ad_images.srcset(variants, "jpeg"),
+                "title": ad.title_text,
+                "redirect_url": ad.redirect_url,
+                "delay_seconds": ad.display_delay_seconds
+            })
+    finally:
+        db.close()
+    
+    snapshot = {"ads_enabled": settings.ads_enabled, "ads": ads}
+    ad_snapshot_cache.clear()
+    ad_snapshot_cache[version] = snapshot
+    return snapshot
+
+
+def page_fingerprint() -> str:
     """
-    session_id = request.cookies.get("session_id")
-    if not session_id or session_id not in user_sessions:
-        session_id = secrets.token_urlsafe(16)
-        user_sessions[session_id] = {
-            "shown_ads": [],
-            "created_at": datetime.now()
+    Hash of everything the rendered index page depends on besides settings
+    """
+    digest = hashlib.sha256()
+    with open(os.path.join("templates", "index.html"), "rb") as f:
+        digest.update(f.read())
+    for directory in ("js", "css"):
+        for filename in sorted(os.listdir(os.path.join("static", directory))):
+            path = f"{directory}/{filename}"
+            digest.update(f"{path}={static_files.fingerprint(path)};".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def build_snapshot_sections() -> dict:
+    """
+    Warm-start state of this worker (see snapshot.py)
+    """
+    version = get_settings_version()
+    sections = {"word_memo": UzbekConverter.export_word_memo()}
+    if version in ad_snapshot_cache:
+        sections["ads"] = {"settings_version": version, "snapshot": ad_snapshot_cache[version]}
+    page = index_page_cache.get(version)
+    if page is not None:
+        sections["index_page"] = {
+            "settings_version": version,
+            "fingerprint": page_fingerprint(),
+            "etag": page["etag"],
+            "identity": base64.b64encode(page["identity"]).decode("ascii"),
+            "gzip": base64.b64encode(page["gzip"]).decode("ascii")
         }
+    return sections
+
+
+def load_warm_start():
+    """
+    Fill in-process caches from the last snapshot; stale sections are skipped
+    """
+    sections = read_snapshot(config.SNAPSHOT_PATH)
+    if sections is None:
+        return
+    
+    try:
+        words = UzbekConverter.load_word_memo(sections.get("word_memo", {}))
+        version = get_settings_version()
+        ads = sections.get("ads")
+        if ads and ads["settings_version"] == version:
+            ad_snapshot_cache[version] = ads["snapshot"]
+        page = sections.get("index_page")
+        if page and page["settings_version"] == version and page["fingerprint"] == page_fingerprint():
+            index_page_cache[version] = {
+                "etag": page["etag"],
+                "identity": base64.b64decode(page["identity"]),
+                "gzip": base64.b64decode(page["gzip"])
+            }
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"❌ Snapshot unusable, starting cold: {e}")
+        return
     
-    return session_id, user_sessions[session_id]
+    print(f"✅ Warm start: {words} words, ads {'warm' if version in ad_snapshot_cache else 'cold'}, "
+          f"index page {'warm' if version in index_page_cache else 'cold'}")
+
+
+def get_user_session(request: Request, db: Session):
+    """
+    Get or create user session (stored in the shared database)
+    """
+    session = get_or_create_session(db, request.cookies.get("session_id"))
+    return session.id, session
 
 
 def verify_admin_token(token: str) -> bool:
@@ -108,7 +385,8 @@ async def log_conversion(
         ip_address=request.client.host if request else None
     )
     db.add(log)
-    db.commit()
+    with span("log_conversion"):
+        db.commit()
 
 
 # ======================
@@ -118,28 +396,30 @@ async def log_conversion(
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """
-    Main user interface
+    Main user interface (shared cached body, per-visitor cookie)
     """
-    # Get user session
-    session_id, session_data = get_user_session(request)
-    
-    # Get settings
-    db = next(get_db())
-    settings = get_settings(db)
+    page = render_index_page(get_settings_version())
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), ["gzip"])
+    # Each body gets its own strong ETag, like the static asset variants
+    etag = page["etag"] if encoding is None else f'{page["etag"][:-1]}-gzip"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
     
-    # Prepare response with session cookie
-    response = templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "ads_enabled": settings.ads_enabled,
-            "modal_delay": settings.modal_delay_seconds
-        }
-    )
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        response = Response(status_code=304, headers=headers)
+    elif encoding == "gzip":
+        headers["Content-Encoding"] = "gzip"
+        response = HTMLResponse(page["gzip"], headers=headers)
+    else:
+        response = HTMLResponse(page["identity"], headers=headers)
     
-    # Set session cookie if not present
+    # Set session cookie if not present (session row is created on first use)
     if not request.cookies.get("session_id"):
-        response.set_cookie(key="session_id", value=session_id, httponly=True)
+        response.set_cookie(key="session_id", value=secrets.token_urlsafe(16), httponly=True)
     
     return response
 
@@ -148,27 +428,178 @@ async def home(request: Request):
 async def convert_text_api(
     request: Request,
     text: str = Form(...),
+    response_format: Optional[str] = Form(None, alias="format"),
     db: Session = Depends(get_db)
 ):
     """
     Convert text between Latin and Cyrillic
+    (format: full, compact or text; see response_formats.py)
     """
     if not text.strip():
         return JSONResponse({"error": "Matn kiriting"}, status_code=400)
+    try:
+        response_format = negotiate_format(request, response_format)
+    except ValueError:
+        return JSONResponse({"error": "Noma'lum javob formati"}, status_code=400)
+    if response_format == "frames":
+        return JSONResponse({"error": "Bu format faqat /api/convert-text-batch uchun"}, status_code=400)
     
-    # Convert text
-    converted_text, direction = UzbekConverter.convert_text(text)
+    # Convert text (in a thread, cancelled on deadline or disconnect)
+    cancel_event = threading.Event()
+    try:
+        converted_text, direction = await run_cancellable(
+            request,
+            tracing.to_thread(UzbekConverter.convert_text, text, cancel_event),
+            cancel_event,
+            config.CONVERSION_DEADLINES["/api/convert-text"]
+        )
+    except RequestCancelled as cancelled:
+        return cancelled_response("/api/convert-text", cancelled)
     
     # Log conversion
     await log_conversion(db, "text", len(text), None, request)
     
-    return JSONResponse({
+    if response_format == "text":
+        return Response(converted_text, media_type=TEXT_MEDIA_TYPE, headers={"X-Conversion-Direction": direction})
+    if response_format == "compact":
+        return FastJSONResponse({"converted": converted_text, "direction": direction})
+    return FastJSONResponse({
         "original": text,
         "converted": converted_text,
         "direction": direction
     })
 
 
+@app.post("/api/convert-text-batch")
+async def convert_text_batch_api(
+    request: Request,
+    texts: List[str] = Form(...),
+    response_format: Optional[str] = Form(None, alias="format"),
+    db: Session = Depends(get_db)
+):
+    """
+    Convert several texts in one request (format: full, compact or frames)
+    """
+    if len(texts) > config.MAX_BATCH_TEXTS:
+        return JSONResponse({"error": f"Bir so'rovda ko'pi bilan {config.MAX_BATCH_TEXTS} ta matn"}, status_code=400)
+    try:
+        response_format = negotiate_format(request, response_format)
+    except ValueError:
+        return JSONResponse({"error": "Noma'lum javob formati"}, status_code=400)
+    if response_format == "text":
+        return JSONResponse({"error": "Bir nechta matn uchun frames formatidan foydalaning"}, status_code=400)
+    
+    cancel_event = threading.Event()
+    
+    def convert_all():
+        return [UzbekConverter.convert_text(text, cancel_event) for text in texts]
+    
+    try:
+        results = await run_cancellable(
+            request,
+            tracing.to_thread(convert_all),
+            cancel_event,
+            config.CONVERSION_DEADLINES["/api/convert-text-batch"]
+        )
+    except RequestCancelled as cancelled:
+        return cancelled_response("/api/convert-text-batch", cancelled)
+    
+    await log_conversion(db, "text", sum(len(text) for text in texts), None, request)
+    
+    if response_format == "frames":
+        return Response(encode_frames(results), media_type=FRAMES_MEDIA_TYPE)
+    if response_format == "compact":
+        return FastJSONResponse({
+            "results": [{"converted": converted, "direction": direction} for converted, direction in results]
+        })
+    return FastJSONResponse({
+        "results": [
+            {"original": text, "converted": converted, "direction": direction}
+            for text, (converted, direction) in zip(texts, results)
+        ]
+    })
+
+
+@app.websocket("/ws/convert")
+async def live_convert(websocket: WebSocket):
+    """
+    Live conversion: the document stays on the server, each edit is
+    answered with a patch to the converted text
+
+    Client messages:
+        {"type": "init", "text": "...", "direction": "auto"}
+        {"type": "edit", "offset": 10, "delete": 1, "insert": "sh"}
+    Server messages:
+        {"type": "reset", "text": "...", "direction": "...", "version": 1}
+        {"type": "patch", "offset": 10, "delete": 1, "insert": "ш", "direction": "...", "version": 2}
+        {"type": "error", "code": "out_of_sync" | "too_large" | "bad_message", "error": "..."}
+        {"type": "error", "code": "rate_limited", "retry_after": 1.5, "error": "..."}
+    """
+    await websocket.accept()
+    document = LiveDocument()
+    client_key = rate_limiter.client_key(websocket.scope)
+    
+    async def send_json(message: dict):
+        # Cyrillic goes out as UTF-8 instead of \uXXXX escapes
+        await websocket.send_text(dumps_text(message))
+    
+    async def send_reset(converted: str):
+        await send_json({
+            "type": "reset",
+            "text": converted,
+            "direction": document.direction,
+            "version": document.version
+        })
+    
+    try:
+        while True:
+            raw_message = await websocket.receive_text()
+            wait = rate_limiter.take_message("/ws/convert", client_key, len(raw_message))
+            if wait:
+                # The message is dropped, so the client re-sends "init" after waiting
+                await send_json({
+                    "type": "error",
+                    "code": "rate_limited",
+                    "retry_after": round(wait, 1),
+                    "error": "So'rovlar juda ko'p, birozdan keyin urinib ko'ring"
+                })
+                continue
+            try:
+                message = json.loads(raw_message)
+                if message.get("type") == "init":
+                    converted = await asyncio.to_thread(
+                        document.reset, str(message.get("text", "")), message.get("direction", "auto")
+                    )
+                    await send_reset(converted)
+                elif message.get("type") == "edit":
+                    patch = await asyncio.to_thread(
+                        document.apply_edit,
+                        int(message["offset"]),
+                        int(message.get("delete", 0)),
+                        str(message.get("insert", ""))
+                    )
+                    if patch is None:
+                        # Detected alphabet changed: everything was re-converted
+                        await send_reset(document.converted_text())
+                    else:
+                        await send_json({
+                            "type": "patch",
+                            **patch,
+                            "direction": document.direction,
+                            "version": document.version
+                        })
+                else:
+                    await send_json({"type": "error", "code": "bad_message", "error": "Noma'lum xabar turi"})
+            except DocumentTooLarge:
+                # Not retryable: the client stops live updates for this text
+                await send_json({"type": "error", "code": "too_large", "error": "Matn jonli konvertatsiya uchun juda katta"})
+            except (AttributeError, KeyError, TypeError, ValueError):
+                # The client re-sends the whole text with "init" after an error
+                await send_json({"type": "error", "code": "out_of_sync", "error": "Tahrirni qo'llab bo'lmadi"})
+    except WebSocketDisconnect:
+        pass
+
+
 @app.post("/api/upload-docx")
 async def upload_docx(
     request: Request,
@@ -180,18 +611,35 @@ async def upload_docx(
     Upload and convert DOCX file
     """
     # Validate file size (max 5MB)
-    content = await file.read()
+    with span("file.read"):
+        content = await file.read()
     if len(content) > 5 * 1024 * 1024:
         return JSONResponse({"error": "Fayl hajmi 5MB dan oshmasligi kerak"}, status_code=400)
     
-    # Convert DOCX
-    input_path, output_path, file_id = await DocxConverter.convert_docx(
-        content, file.filename, direction
-    )
+    # Convert DOCX (cancelled at paragraph granularity on deadline or disconnect)
+    cancel_event = threading.Event()
+    try:
+        input_path, output_path, file_id = await run_cancellable(
+            request,
+            DocxConverter.convert_docx(content, file.filename, direction, cancel_event),
+            cancel_event,
+            config.CONVERSION_DEADLINES["/api/upload-docx"]
+        )
+    except RequestCancelled as cancelled:
+        # Finished anyway after the client left: nobody will download it
+        if cancelled.result:
+            for path in cancelled.result[:2]:
+                if path:
+                    DocxConverter.cleanup_file(path)
+        return cancelled_response("/api/upload-docx", cancelled)
     
     if not file_id or not output_path:
         return JSONResponse({"error": "Faylni konvert qilishda xatolik"}, status_code=400)
     
+    # Register result so any worker can serve the download
+    with span("save_job"):
+        save_job(db, file_id, "done", output_path, file.filename)
+    
     # Log conversion
     await log_conversion(db, "docx", 0, file.filename, request)
     
@@ -203,20 +651,213 @@ async def upload_docx(
     })
 
 
-@app.get("/api/download/{file_id}")
-async def download_file(file_id: str):
+async def stream_converted_zip(request: Request, files: List[UploadFile], direction: str):
     """
-    Download converted DOCX file
+    Convert files concurrently and stream a ZIP entry as each one completes.
+    At the deadline the archive is finished with the files converted so far
+    and errors.txt lists the rest; on disconnect the stream just stops.
     """
-    filepath = os.path.join("uploads", f"converted_{file_id}.docx")
+    writer = ZipStreamWriter()
+    cancel_event = threading.Event()
+    deadline = config.CONVERSION_DEADLINES["/api/upload-docx-batch"]
+    started = time.monotonic()
+    pending_uploads = iter(files)
+    tasks = {}
+    errors = []
+    
+    async def convert_one(upload: UploadFile):
+        if not upload.filename or not upload.filename.lower().endswith(".docx"):
+            raise ValueError("Faqat .docx fayllarni yuklash mumkin")
+        content = await upload.read()
+        if len(content) > config.MAX_UPLOAD_SIZE:
+            raise ValueError("Fayl hajmi 5MB dan oshmasligi kerak")
+        input_path, output_path, result = await DocxConverter.convert_docx(
+            content, upload.filename, direction, cancel_event
+        )
+        if not output_path:
+            raise ValueError(result)
+        return input_path, output_path
+    
+    def start_next():
+        upload = next(pending_uploads, None)
+        if upload is not None:
+            tasks[asyncio.ensure_future(convert_one(upload))] = upload
     
-    if not os.path.exists(filepath):
+    # At most BATCH_CONCURRENCY files are held in memory at once
+    for _ in range(config.BATCH_CONCURRENCY):
+        start_next()
+    
+    db = SessionLocal()
+    try:
+        while tasks:
+            try:
+                done, _ = await run_cancellable(
+                    request,
+                    asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED),
+                    cancel_event,
+                    deadline - (time.monotonic() - started)
+                )
+            except RequestCancelled as cancelled:
+                cancellation_metrics.record("/api/upload-docx-batch", cancelled.reason, cancelled.elapsed)
+                if cancelled.reason == "disconnected":
+                    return
+                # Files finished in the meantime are dropped too, their output is removed
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+                for result in results:
+                    if not isinstance(result, BaseException):
+                        for path in result:
+                            DocxConverter.cleanup_file(path)
+                unconverted = list(tasks.values()) + list(pending_uploads)
+                tasks.clear()
+                errors.extend(f"{upload.filename}: Konvertatsiya juda uzoq davom etdi" for upload in unconverted)
+                break
+            for task in done:
+                upload = tasks.pop(task)
+                start_next()
+                try:
+                    input_path, output_path = task.result()
+                except Exception as e:
+                    errors.append(f"{upload.filename}: {e}")
+                    continue
+                
+                try:
+                    name = f"converted_{os.path.basename(upload.filename)}"
+                    for chunk in writer.add_file(output_path, name):
+                        yield chunk
+                finally:
+                    DocxConverter.cleanup_file(input_path)
+                    DocxConverter.cleanup_file(output_path)
+                
+                await log_conversion(db, "docx", 0, upload.filename, request)
+        
+        if errors:
+            yield writer.add_text("errors.txt", "\n".join(errors) + "\n")
+        yield writer.close()
+    finally:
+        # Client went away or something failed: stop remaining conversions
+        cancel_event.set()
+        for task in tasks:
+            task.cancel()
+        db.close()
+
+
+@app.post("/api/upload-docx-batch")
+async def upload_docx_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    direction: str = Form("auto")
+):
+    """
+    Upload many DOCX files and download them converted as one ZIP
+    """
+    if len(files) > config.MAX_BATCH_FILES:
+        return JSONResponse(
+            {"error": f"Bir vaqtda {config.MAX_BATCH_FILES} tadan ortiq fayl yuklab bo'lmaydi"},
+            status_code=400
+        )
+    
+    return StreamingResponse(
+        stream_converted_zip(request, files, direction),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="latinify_converted.zip"'}
+    )
+
+
+@app.post("/api/convert-file")
+async def convert_text_file_api(
+    request: Request,
+    file: UploadFile = File(...),
+    direction: str = Form("auto"),
+    db: Session = Depends(get_db)
+):
+    """
+    Convert a .txt, .srt or .csv file, streamed line by line into the response.
+    Past the deadline the stream is aborted, so the client never keeps a
+    silently truncated file.
+    """
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if extension not in config.ALLOWED_TEXT_EXTENSIONS:
+        return JSONResponse({"error": "Faqat .txt, .srt yoki .csv fayllarni yuklash mumkin"}, status_code=400)
+    if file.size is not None and file.size > config.MAX_TEXT_FILE_SIZE:
+        return JSONResponse({"error": "Fayl hajmi 50MB dan oshmasligi kerak"}, status_code=400)
+    
+    # The upload is spooled to a temporary file; read it in small pieces
+    def read_chunks():
+        while True:
+            chunk = file.file.read(config.TEXT_STREAM_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+    
+    # Logged once the stream ends, with the number of characters actually converted
+    stats = {"chars": 0}
+    
+    async def log_converted():
+        await log_conversion(db, "file", stats["chars"], file.filename, request)
+    
+    async def converted_chunks():
+        # One group of lines per thread hop, each watched for deadline and disconnect
+        chunks = convert_text_stream(read_chunks(), extension, direction, stats)
+        cancel_event = threading.Event()
+        deadline = config.CONVERSION_DEADLINES["/api/convert-file"]
+        started = time.monotonic()
+        while True:
+            try:
+                chunk = await run_cancellable(
+                    request,
+                    tracing.to_thread(next, chunks, None),
+                    cancel_event,
+                    deadline - (time.monotonic() - started)
+                )
+            except RequestCancelled as cancelled:
+                cancellation_metrics.record("/api/convert-file", cancelled.reason, cancelled.elapsed)
+                if cancelled.reason == "disconnected":
+                    return
+                raise
+            if chunk is None:
+                return
+            yield chunk
+    
+    return StreamingResponse(
+        converted_chunks(),
+        media_type=TEXT_FILE_MEDIA_TYPES[extension],
+        headers={"Content-Disposition": content_disposition(f"latinify_{os.path.basename(file.filename)}")},
+        background=BackgroundTask(log_converted)
+    )
+
+
+@app.api_route("/api/download/{file_id}", methods=["GET", "HEAD"])
+async def download_file(file_id: str, db: Session = Depends(get_db)):
+    """
+    Download converted DOCX file (resumable with Range requests)
+    """
+    job = get_job(db, file_id)
+    if not job or job.status != "done":
         return JSONResponse({"error": "Fayl topilmadi"}, status_code=404)
     
-    return FileResponse(
+    filepath = job.output_path
+    if not filepath or not os.path.exists(filepath):
+        return JSONResponse({"error": "Fayl topilmadi"}, status_code=404)
+    
+    on_complete = None
+    if config.DOWNLOAD_ONE_SHOT:
+        async def on_complete():
+            DocxConverter.cleanup_file(filepath)
+            cleanup_db = SessionLocal()
+            try:
+                delete_job(cleanup_db, file_id)
+            finally:
+                cleanup_db.close()
+    
+    # Converted files never change, so the id and size identify the content
+    return DownloadResponse(
         filepath,
+        filename=f"latinify_converted_{file_id}.docx",
+        etag=f'"{file_id}-{os.path.getsize(filepath)}"',
+        last_modified=job.created_at.replace(tzinfo=timezone.utc).timestamp(),
         media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        filename=f"latinify_converted_{file_id}.docx"
+        lease_seconds=config.FILE_RETENTION / 3,
+        on_complete=on_complete
     )
 
 
@@ -226,36 +867,26 @@ async def get_advertisement(request: Request, db: Session = Depends(get_db)):
     Get random advertisement for user
     """
     # Get user session
-    session_id, session_data = get_user_session(request)
+    session_id, session_data = get_user_session(request, db)
     
-    # Get settings
-    settings = get_settings(db)
+    # Settings and active ads (cached per settings version)
+    snapshot = get_ad_snapshot(get_settings_version())
     
-    if not settings.ads_enabled:
-        return JSONResponse({"ad": None})
+    payload = {"ad": None}
     
     # Get random active ad
-    ad = get_random_ad(db)
-    if not ad:
-        return JSONResponse({"ad": None})
-    
-    # Check if user has already seen this ad
-    if ad.id in session_data.get("shown_ads", []):
-        return JSONResponse({"ad": None})
+    ad = random.choice(snapshot["ads"]) if snapshot["ads_enabled"] and snapshot["ads"] else None
     
-    # Mark ad as shown for this session
-    session_data.setdefault("shown_ads", []).append(ad.id)
-    user_sessions[session_id] = session_data
+    # Show the ad only if the user has not seen it yet
+    if ad and ad["id"] not in session_data.get_shown_ads():
+        # Mark ad as shown for this session
+        mark_ad_shown(db, session_data, ad["id"])
+        payload["ad"] = ad
     
-    return JSONResponse({
-        "ad": {
-            "id": ad.id,
-            "image_url": ad.image_path,
-            "title": ad.title_text,
-            "redirect_url": ad.redirect_url,
-            "delay_seconds": ad.display_delay_seconds
-        }
-    })
+    response = JSONResponse(payload)
+    if request.cookies.get("session_id") != session_id:
+        response.set_cookie(key="session_id", value=session_id, httponly=True)
+    return response
 
 
 # ======================
@@ -302,16 +933,44 @@ async def admin_settings(request: Request, token: str):
 # ADMIN API ROUTES
 # ======================
 
+def page_size(limit: int) -> int:
+    return max(1, min(limit, config.ADMIN_MAX_PAGE_SIZE))
+
+
+def parse_admin_date(value: Optional[str], end_of_day: bool = False) -> Optional[int]:
+    """
+    Unix seconds of an ISO date or datetime (UTC); a bare date used as an
+    upper bound covers the whole day
+    """
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        moment += timedelta(days=1, seconds=-1)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
 @app.get("/api/admin/ads")
-async def get_all_ads(token: str, db: Session = Depends(get_db)):
+async def get_all_ads(
+    token: str,
+    limit: int = config.ADMIN_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Get all advertisements
+    Get advertisements, newest first, one page at a time
     """
     if not verify_admin_token(token):
         raise HTTPException(status_code=403, detail="Ruxsat etilmagan")
     
-    ads = db.query(Advertisement).order_by(Advertisement.created_at.desc()).all()
-    return JSONResponse({"ads": [ad.to_dict() for ad in ads]})
+    try:
+        ads, next_cursor = get_ads_page(db, page_size(limit), cursor)
+    except ValueError:
+        return JSONResponse({"error": "Noto'g'ri sahifa kursori"}, status_code=400)
+    
+    return JSONResponse({"ads": [ad.to_dict() for ad in ads], "next_cursor": next_cursor})
 
 
 @app.post("/api/admin/ads/create")
@@ -330,20 +989,20 @@ async def create_ad(
     if not verify_admin_token(token):
         raise HTTPException(status_code=403, detail="Ruxsat etilmagan")
     
-    # Validate image
-    if not image.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Faqat rasm fayllari")
-    
-    # Save image
     image_content = await image.read()
-    if len(image_content) > 2 * 1024 * 1024:  # 2MB limit
+    if len(image_content) > config.MAX_IMAGE_SIZE:
         raise HTTPException(status_code=400, detail="Rasm hajmi 2MB dan oshmasligi kerak")
     
-    image_path = await save_ad_image(image_content, image.filename)
+    # Validate by decoding, then store resized WebP/JPEG variants
+    try:
+        variants = await ad_images.save_ad_image(image_content)
+    except ad_images.InvalidAdImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Create ad
     ad = Advertisement(
-        image_path=image_path,
+        image_path=ad_images.fallback_url(variants),
+        image_variants=json.dumps(variants, separators=(",", ":")),
         title_text=title_text,
         redirect_url=redirect_url,
         display_delay_seconds=display_delay_seconds,
@@ -353,6 +1012,7 @@ async def create_ad(
     db.add(ad)
     db.commit()
     db.refresh(ad)
+    bump_settings_version()
     
     return JSONResponse({"success": True, "ad": ad.to_dict()})
 
@@ -375,6 +1035,7 @@ async def toggle_ad(
     
     ad.active = not ad.active
     db.commit()
+    bump_settings_version()
     
     return JSONResponse({"success": True, "active": ad.active})
 
@@ -395,14 +1056,19 @@ async def delete_ad(
     if not ad:
         raise HTTPException(status_code=404, detail="Reklama topilmadi")
     
-    # Delete image file if exists
-    if ad.image_path and ad.image_path.startswith("/static/ads/"):
-        image_path = ad.image_path[1:]  # Remove leading slash
-        if os.path.exists(image_path):
-            os.remove(image_path)
+    # Delete image files unless another ad uses the same content
+    urls = ad_images.variant_urls(ad.get_image_variants()) | {ad.image_path}
+    for other in db.query(Advertisement).filter(Advertisement.id != ad.id).all():
+        urls -= ad_images.variant_urls(other.get_image_variants()) | {other.image_path}
+    for url in urls:
+        if url and url.startswith("/static/ads/"):
+            image_path = url[1:]  # Remove leading slash
+            if os.path.exists(image_path):
+                os.remove(image_path)
     
     db.delete(ad)
     db.commit()
+    bump_settings_version()
     
     return JSONResponse({"success": True})
 
@@ -441,6 +1107,7 @@ async def update_settings(
     settings.modal_delay_seconds = modal_delay_seconds
     
     db.commit()
+    bump_settings_version()
     
     return JSONResponse({"success": True, "settings": settings.to_dict()})
 
@@ -455,11 +1122,13 @@ async def get_stats(token: str, db: Session = Depends(get_db)):
     
     total_ads = db.query(Advertisement).count()
     active_ads = db.query(Advertisement).filter(Advertisement.active == True).count()
-    total_conversions = db.query(ConversionLog).count()
+    # The table is bounded by retention; older rows only live in the archive counter
+    archived_conversions = get_counter(db, ARCHIVED_COUNTER)
+    total_conversions = db.query(ConversionLog).count() + archived_conversions
     
     # Recent conversions
     recent_conversions = db.query(ConversionLog)\
-        .order_by(ConversionLog.timestamp.desc())\
+        .order_by(ConversionLog.ts.desc(), ConversionLog.id.desc())\
         .limit(10)\
         .all()
     
@@ -467,8 +1136,12 @@ async def get_stats(token: str, db: Session = Depends(get_db)):
         "stats": {
             "total_ads": total_ads,
             "active_ads": active_ads,
-            "total_conversions": total_conversions
+            "total_conversions": total_conversions,
+            "archived_conversions": archived_conversions
         },
+        "word_cache": UzbekConverter.word_cache_stats(),
+        "rate_limit": rate_limiter.stats(),
+        "cancellations": cancellation_metrics.stats(),
         "recent_conversions": [
             {
                 "type": conv.conversion_type,
@@ -481,6 +1154,114 @@ async def get_stats(token: str, db: Session = Depends(get_db)):
     })
 
 
+@app.get("/api/admin/traces")
+async def get_slowest_traces(token: str, limit: int = 20, path: Optional[str] = None):
+    """
+    Slowest recent requests of this worker with their phase breakdown
+    """
+    if not verify_admin_token(token):
+        raise HTTPException(status_code=403, detail="Ruxsat etilmagan")
+    
+    return JSONResponse({
+        "worker_pid": os.getpid(),
+        "buffered": len(trace_buffer),
+        "traces": trace_buffer.slowest(max(1, min(limit, config.TRACE_BUFFER_SIZE)), path)
+    })
+
+
+@app.get("/api/admin/profile")
+async def get_profile_sessions(token: str):
+    """
+    Profiling sessions armed on this worker
+    """
+    if not verify_admin_token(token):
+        raise HTTPException(status_code=403, detail="Ruxsat etilmagan")
+    
+    return JSONResponse({"worker_pid": os.getpid(), "sessions": profiler.status()})
+
+
+@app.post("/api/admin/profile")
+async def start_profile(token: str, path: str = Form(...), count: int = Form(5)):
+    """
+    Run cProfile on the next `count` requests to `path` (on this worker)
+    """
+    if not verify_admin_token(token):
+        raise HTTPException(status_code=403, detail="Ruxsat etilmagan")
+    if not path.startswith(config.TRACE_PATHS):
+        return JSONResponse({"error": "Bu yo'l kuzatilmaydi"}, status_code=400)
+    
+    session = profiler.arm(path, count)
+    return JSONResponse({
+        "success": True,
+        "worker_pid": os.getpid(),
+        "session": session,
+        "download_url": f"/api/admin/profile/{session['id']}"
+    })
+
+
+@app.get("/api/admin/profile/{profile_id}")
+async def download_profile(profile_id: str, token: str):
+    """
+    Download merged cProfile stats (open with pstats or snakeviz)
+    """
+    if not verify_admin_token(token):
+        raise HTTPException(status_code=403, detail="Ruxsat etilmagan")
+    
+    filepath = profiler.path_for(profile_id)
+    if not filepath:
+        raise HTTPException(status_code=404, detail="Profil topilmadi")
+    
+    return FileResponse(filepath, filename=f"{profile_id}.prof", media_type="application/octet-stream")
+
+
+@app.get("/api/admin/conversions")
+async def get_conversions(
+    token: str,
+    limit: int = config.ADMIN_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    conversion_type: Optional[str] = Query(None, alias="type"),
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    ip: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Browse conversion logs, newest first, with optional filters
+    """
+    if not verify_admin_token(token):
+        raise HTTPException(status_code=403, detail="Ruxsat etilmagan")
+    
+    if conversion_type and conversion_type not in CONVERSION_TYPES:
+        return JSONResponse({"error": "Noma'lum konvertatsiya turi"}, status_code=400)
+    try:
+        ts_from = parse_admin_date(date_from)
+        ts_to = parse_admin_date(date_to, end_of_day=True)
+    except ValueError:
+        return JSONResponse({"error": "Sana formati noto'g'ri (YYYY-MM-DD)"}, status_code=400)
+    try:
+        packed_ip = ipaddress.ip_address(ip.strip()).packed if ip else None
+    except ValueError:
+        return JSONResponse({"error": "IP manzil noto'g'ri"}, status_code=400)
+    
+    try:
+        rows, next_cursor = get_conversion_page(
+            db,
+            page_size(limit),
+            cursor,
+            type_code=CONVERSION_TYPES[conversion_type] if conversion_type else None,
+            ts_from=ts_from,
+            ts_to=ts_to,
+            ip=packed_ip
+        )
+    except ValueError:
+        return JSONResponse({"error": "Noto'g'ri sahifa kursori"}, status_code=400)
+    
+    return JSONResponse({
+        "conversions": [row.to_dict() for row in rows],
+        "next_cursor": next_cursor
+    })
+
+
 # ======================
 # HEALTH CHECK
 # ======================
@@ -518,9 +1299,14 @@ async def server_error_handler(request: Request, exc):
 # ======================
 
 if __name__ == "__main__":
+    # Workers share sessions and conversion jobs through SQLite and
+    # converted files through uploads/, so any worker can serve any request.
+    # They read the worker count from WEB_CONCURRENCY to size their pools
+    os.environ["WEB_CONCURRENCY"] = str(config.WORKERS)
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
-        port=int(os.getenv("PORT", 8000)),
+        port=config.PORT,
+        workers=config.WORKERS,
         log_level="info"
     )
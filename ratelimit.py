@@ -0,0 +1,218 @@
+"""
+ratelimit.py - Per-IP token bucket rate limiting and per-route concurrency caps
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Dict
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` tokens per second
+    """
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, cost: float, capacity: float, rate: float, now: float) -> float:
+        """
+        Take `cost` tokens; returns 0 on success or seconds until enough tokens
+        """
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / rate
+
+
+class BucketStore:
+    """
+    Bounded LRU map of client key -> TokenBucket; idle buckets expire
+    """
+
+    def __init__(self, max_entries: int, idle_seconds: float):
+        self.max_entries = max_entries
+        self.idle_seconds = idle_seconds
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def get(self, key: str, capacity: float, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(capacity, now)
+            self._buckets[key] = bucket
+        else:
+            self._buckets.move_to_end(key)
+
+        # Least recently used entries are at the front
+        while self._buckets:
+            oldest_key, oldest = next(iter(self._buckets.items()))
+            if len(self._buckets) > self.max_entries or now - oldest.updated > self.idle_seconds:
+                if oldest is bucket:
+                    break
+                del self._buckets[oldest_key]
+            else:
+                break
+        return bucket
+
+
+class RateLimiter:
+    """
+    Per-IP token buckets and per-route concurrency caps
+
+    routes: {path: {"base_cost": tokens per request (per message for WebSockets),
+                    "cost_per_kb": tokens per KB of request body or message,
+                    "max_concurrent": requests in flight for the route,
+                    "max_per_client": open WebSockets per client IP}}
+    """
+
+    def __init__(
+        self,
+        routes: Dict[str, dict],
+        capacity: float,
+        refill_per_second: float,
+        max_clients: int = 100_000,
+        idle_seconds: float = 600,
+        enabled: bool = True
+    ):
+        self.routes = routes
+        self.capacity = capacity
+        self.rate = refill_per_second
+        self.enabled = enabled
+        self.buckets = BucketStore(max_clients, idle_seconds)
+        self.active: Dict[str, int] = {path: 0 for path in routes}
+        self.sockets: Dict[str, int] = {}  # client IP -> open WebSockets
+        self.rejected = {"rate_limited": 0, "overloaded": 0}
+
+    @staticmethod
+    def client_key(scope: Scope) -> str:
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def cost(self, rule: dict, size: int) -> float:
+        cost = rule.get("base_cost", 1) + size / 1024 * rule.get("cost_per_kb", 0)
+        # A request costing more than a full bucket would never pass
+        return min(cost, self.capacity)
+
+    def request_cost(self, rule: dict, headers: Headers) -> float:
+        try:
+            body_size = int(headers.get("content-length", 0))
+        except ValueError:
+            body_size = 0
+        return self.cost(rule, body_size)
+
+    def take(self, key: str, cost: float) -> float:
+        """
+        Charge a client's bucket; returns 0 on success or seconds to wait
+        """
+        now = time.monotonic()
+        bucket = self.buckets.get(key, self.capacity, now)
+        wait = bucket.take(cost, self.capacity, self.rate, now)
+        if wait:
+            self.rejected["rate_limited"] += 1
+        return wait
+
+    def take_message(self, path: str, key: str, size: int) -> float:
+        """
+        Charge one WebSocket message of `size` characters (0 when not limited)
+        """
+        rule = self.routes.get(path)
+        if rule is None or not self.enabled:
+            return 0.0
+        return self.take(key, self.cost(rule, size))
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self.buckets),
+            "active": dict(self.active),
+            "sockets": sum(self.sockets.values()),
+            "rejected": dict(self.rejected)
+        }
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware answering 429/503 with Retry-After for limited routes.
+    WebSockets over the per-client cap are refused; their messages are
+    charged by the endpoint with RateLimiter.take_message
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = self.limiter
+        path = scope.get("path", "")
+        rule = limiter.routes.get(path) if limiter.enabled else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+        if scope["type"] == "websocket":
+            await self._websocket(scope, receive, send, rule)
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_concurrent = rule.get("max_concurrent")
+        if max_concurrent is not None and limiter.active[path] >= max_concurrent:
+            limiter.rejected["overloaded"] += 1
+            await self._reject(send, 503, 1, "Server band, birozdan keyin urinib ko'ring")
+            return
+
+        wait = limiter.take(limiter.client_key(scope), limiter.request_cost(rule, Headers(scope=scope)))
+        if wait:
+            await self._reject(send, 429, wait, "So'rovlar juda ko'p, birozdan keyin urinib ko'ring")
+            return
+
+        limiter.active[path] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.active[path] -= 1
+
+    async def _websocket(self, scope: Scope, receive: Receive, send: Send, rule: dict):
+        limiter = self.limiter
+        key = limiter.client_key(scope)
+        max_per_client = rule.get("max_per_client")
+        if max_per_client is not None and limiter.sockets.get(key, 0) >= max_per_client:
+            limiter.rejected["overloaded"] += 1
+            # Closing before accept refuses the handshake (HTTP 403)
+            await receive()
+            await send({"type": "websocket.close", "code": 1008})
+            return
+
+        limiter.sockets[key] = limiter.sockets.get(key, 0) + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.sockets[key] -= 1
+            if not limiter.sockets[key]:
+                del limiter.sockets[key]
+
+    @staticmethod
+    async def _reject(send: Send, status: int, retry_after: float, message: str):
+        body = json.dumps({"error": message}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
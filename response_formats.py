@@ -0,0 +1,80 @@
+"""
+response_formats.py - Response formats of the text conversion endpoints
+
+- full:    {"original", "converted", "direction"} (the default)
+- compact: {"converted", "direction"}; the client already has its input
+- text:    the converted text as text/plain, direction in X-Conversion-Direction
+- frames:  batch results as binary frames (application/x-latinify-frames).
+           Each frame is a 1-byte direction code (FRAME_DIRECTIONS), a 4-byte
+           big-endian length and that many bytes of UTF-8 text.
+
+JSON is encoded with orjson when it is installed; otherwise stdlib json is
+used. Both write non-ASCII characters as UTF-8, not as \\uXXXX escapes.
+"""
+
+import json
+import struct
+from typing import Iterable, Optional, Tuple
+
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used without it
+    orjson = None
+
+FORMATS = ("full", "compact", "text", "frames")
+FRAMES_MEDIA_TYPE = "application/x-latinify-frames"
+TEXT_MEDIA_TYPE = "text/plain"  # Starlette appends "; charset=utf-8"
+
+# Direction codes stored in the first byte of each frame
+FRAME_DIRECTIONS = {"none": 0, "latin_to_cyrillic": 1, "cyrillic_to_latin": 2}
+
+_FRAME_HEADER = struct.Struct(">BI")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_text(content) -> str:
+    # For WebSocket text frames
+    return dumps(content).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def negotiate_format(request: HTTPConnection, requested: Optional[str]) -> str:
+    """
+    Response format from an explicit "format" parameter, else from Accept.
+    Raises ValueError for an unknown format.
+    """
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(requested)
+        return requested
+
+    accepted = [part.split(";")[0].strip().lower() for part in request.headers.get("accept", "").split(",")]
+    if FRAMES_MEDIA_TYPE in accepted:
+        return "frames"
+    if "text/plain" in accepted and "application/json" not in accepted:
+        return "text"
+    return "full"
+
+
+def encode_frames(results: Iterable[Tuple[str, str]]) -> bytes:
+    """
+    Binary frames for (converted text, direction) pairs
+    """
+    parts = []
+    for converted, direction in results:
+        data = converted.encode("utf-8")
+        parts.append(_FRAME_HEADER.pack(FRAME_DIRECTIONS.get(direction, 0), len(data)))
+        parts.append(data)
+    return b"".join(parts)
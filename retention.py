@@ -0,0 +1,183 @@
+"""
+retention.py - Conversion log retention: archiving, legacy table drain and incremental VACUUM
+
+Rows older than LOG_RETENTION_DAYS, or beyond LOG_MAX_ROWS, are moved into
+gzip JSONL files partitioned by day (data/archive/conversions-YYYY-MM-DD.jsonl.gz)
+and counted in the "archived_conversions" counter, so the table and every
+stats query stay bounded.
+"""
+
+import os
+import gzip
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+import config
+from database import SessionLocal, ConversionLog, engine, increment_counter
+
+# Original string-based table, drained into ConversionLog and then dropped
+LEGACY_TABLE = "conversion_logs"
+ARCHIVED_COUNTER = "archived_conversions"
+
+
+def archive_path(archive_dir: str, day: str) -> str:
+    return os.path.join(archive_dir, f"conversions-{day}.jsonl.gz")
+
+
+def write_archive(archive_dir: str, rows: list):
+    """
+    Append rows to their day's archive (each append is a new gzip member)
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    by_day = defaultdict(list)
+    for row in rows:
+        by_day[row.timestamp.strftime("%Y-%m-%d")].append(json.dumps(row.to_dict(), ensure_ascii=False))
+
+    for day, lines in by_day.items():
+        with open(archive_path(archive_dir, day), "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab", mtime=0) as archive:
+                archive.write(("\n".join(lines) + "\n").encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def read_archive(archive_dir: str, day: str) -> list:
+    """
+    Read one day's archived rows back as dicts
+    """
+    with gzip.open(archive_path(archive_dir, day), "rt", encoding="utf-8") as archive:
+        return [json.loads(line) for line in archive if line.strip()]
+
+
+def drain_legacy_logs(db, batch_size: int) -> int:
+    """
+    Move rows of the original conversion_logs table into ConversionLog
+    in batches and drop the table once it is empty
+    """
+    if not inspect(db.get_bind()).has_table(LEGACY_TABLE):
+        return 0
+
+    moved = 0
+    while True:
+        rows = db.execute(
+            text(
+                f"SELECT id, conversion_type, text_length, file_name, timestamp, ip_address "
+                f"FROM {LEGACY_TABLE} ORDER BY id LIMIT :limit"
+            ),
+            {"limit": batch_size}
+        ).fetchall()
+        if not rows:
+            db.execute(text(f"DROP TABLE IF EXISTS {LEGACY_TABLE}"))
+            db.commit()
+            return moved
+
+        for row in rows:
+            log = ConversionLog(
+                conversion_type=row.conversion_type,
+                text_length=row.text_length or 0,
+                file_name=row.file_name,
+                ip_address=row.ip_address
+            )
+            log.timestamp = datetime.fromisoformat(row.timestamp) if row.timestamp else datetime.utcnow()
+            db.add(log)
+
+        deleted = db.execute(
+            text(f"DELETE FROM {LEGACY_TABLE} WHERE id <= :last_id"),
+            {"last_id": rows[-1].id}
+        ).rowcount
+        if deleted != len(rows):
+            # Another worker is draining the same rows
+            db.rollback()
+            return moved
+        db.commit()
+        moved += len(rows)
+
+
+def archive_old_logs(db, archive_dir: str, max_age_seconds: int, max_rows: int, batch_size: int) -> int:
+    """
+    Archive rows older than max_age_seconds and the oldest rows beyond
+    max_rows; returns the number of archived rows
+    """
+    cutoff = int(time.time()) - max_age_seconds
+    excess = db.query(ConversionLog).count() - max_rows
+    archived = 0
+
+    while True:
+        query = db.query(ConversionLog).order_by(ConversionLog.ts, ConversionLog.id)
+        if excess <= 0:
+            query = query.filter(ConversionLog.ts < cutoff)
+        # Both conditions select a prefix of the (ts, id) order
+        rows = [
+            row for position, row in enumerate(query.limit(batch_size).all())
+            if row.ts < cutoff or position < excess
+        ]
+        if not rows:
+            return archived
+
+        # Deleting first takes the write lock, so only one worker archives a batch
+        deleted = db.query(ConversionLog)\
+            .filter(ConversionLog.id.in_([row.id for row in rows]))\
+            .delete(synchronize_session=False)
+        if deleted != len(rows):
+            db.rollback()
+            return archived
+
+        try:
+            write_archive(archive_dir, rows)
+        except OSError:
+            db.rollback()
+            raise
+        increment_counter(db, ARCHIVED_COUNTER, len(rows))
+        db.commit()
+        archived += len(rows)
+        excess -= len(rows)
+
+
+def incremental_vacuum(max_pages: int) -> int:
+    """
+    Return up to max_pages free pages to the filesystem; returns pages freed
+    """
+    connection = engine.raw_connection()
+    try:
+        sqlite = connection.driver_connection
+        if sqlite.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # One-time rebuild of a database created before auto_vacuum was enabled
+            sqlite.executescript("PRAGMA auto_vacuum=INCREMENTAL; VACUUM;")
+        free_before = sqlite.execute("PRAGMA freelist_count").fetchone()[0]
+        # execute() steps the pragma once and frees a single page;
+        # executescript() runs it to completion
+        sqlite.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        free_after = sqlite.execute("PRAGMA freelist_count").fetchone()[0]
+        # Pages are only released from the main file at a checkpoint
+        sqlite.executescript("PRAGMA wal_checkpoint(TRUNCATE);")
+        return free_before - free_after
+    finally:
+        connection.close()
+
+
+def run_retention() -> dict:
+    """
+    One retention pass: drain the legacy table, archive old rows, vacuum
+    """
+    db = SessionLocal()
+    try:
+        drained = drain_legacy_logs(db, config.LOG_RETENTION_BATCH)
+        archived = archive_old_logs(
+            db,
+            config.LOG_ARCHIVE_DIR,
+            config.LOG_RETENTION_DAYS * 24 * 60 * 60,
+            config.LOG_MAX_ROWS,
+            config.LOG_RETENTION_BATCH
+        )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    freed_pages = incremental_vacuum(config.LOG_VACUUM_PAGES)
+    return {"drained": drained, "archived": archived, "freed_pages": freed_pages}
@@ -0,0 +1,71 @@
+"""
+snapshot.py - Warm-start snapshot of in-process caches
+
+The snapshot is written at shutdown and every SNAPSHOT_INTERVAL seconds, and
+loaded at startup, so a restarted or freshly deployed worker starts with warm
+caches. It holds the word conversion memo, the settings/ads snapshot used
+by /api/get-ad and the rendered index page.
+
+The file is gzip JSON with a header. The whole file is ignored when the
+snapshot format or the conversion rules changed. Each section carries its
+own validity key (settings version, page fingerprint) that the loader checks.
+Sessions and conversion jobs live in SQLite and need no snapshot.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+from typing import Optional
+
+import converter
+from translit_js import rules_version
+
+SNAPSHOT_FORMAT = 1
+
+
+def rules_fingerprint() -> str:
+    """
+    Changes whenever a word could convert differently (code, tables or lexicon)
+    """
+    with open(converter.__file__, "rb") as f:
+        source = f.read()
+    return hashlib.sha256(source + rules_version().encode("ascii")).hexdigest()[:16]
+
+
+def write_snapshot(path: str, sections: dict):
+    """
+    Atomically replace the snapshot file
+    """
+    content = {
+        "format": SNAPSHOT_FORMAT,
+        "rules": rules_fingerprint(),
+        "created_at": time.time(),
+        "sections": sections,
+    }
+    payload = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    data = gzip.compress(payload, compresslevel=6, mtime=0)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> Optional[dict]:
+    """
+    Sections of a valid snapshot, or None when it is missing, corrupt or stale
+    """
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            content = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError) as e:
+        print(f"❌ Snapshot unreadable, starting cold: {e}")
+        return None
+
+    if content.get("format") != SNAPSHOT_FORMAT or content.get("rules") != rules_fingerprint():
+        return None
+    return content.get("sections") or {}
@@ -10,6 +10,9 @@ const adminToken = urlParams.get('token');
 // State variables
 let currentTab = 'ads';
 let adsData = [];
+let adsCursor = null;  // next page of ads, null when all are loaded
+let conversionCursors = [null];  // cursor of each visited conversions page
+let nextConversionsCursor = null;
 
 // DOM Elements for tabs
 const showAdsTab = document.getElementById('showAdsTab');
@@ -24,12 +27,21 @@ const addTab = document.getElementById('addTab');
 const adsTableBody = document.getElementById('adsTableBody');
 const noAdsMessage = document.getElementById('noAdsMessage');
 const refreshAds = document.getElementById('refreshAds');
+const loadMoreAds = document.getElementById('loadMoreAds');
 
 // Stats elements
 const totalAds = document.getElementById('totalAds');
 const activeAds = document.getElementById('activeAds');
 const totalConversions = document.getElementById('totalConversions');
 const recentActivity = document.getElementById('recentActivity');
+const conversionFilters = document.getElementById('conversionFilters');
+const filterType = document.getElementById('filterType');
+const filterDateFrom = document.getElementById('filterDateFrom');
+const filterDateTo = document.getElementById('filterDateTo');
+const filterIp = document.getElementById('filterIp');
+const prevConversions = document.getElementById('prevConversions');
+const nextConversions = document.getElementById('nextConversions');
+const conversionsPage = document.getElementById('conversionsPage');
 
 // Add ad form elements
 const addAdForm = document.getElementById('addAdForm');
@@ -75,6 +87,7 @@ function switchTab(tabName) {
             showStatsTab.className = 'w-full text-left px-4 py-3 rounded-lg bg-blue-50 text-blue-700 border border-blue-200 font-medium';
             statsTab.classList.remove('hidden');
             loadStats();
+            loadConversions();
             break;
         case 'add':
             showAddTab.className = 'w-full text-left px-4 py-3 rounded-lg bg-blue-50 text-blue-700 border border-blue-200 font-medium';
@@ -90,10 +103,14 @@ function switchTab(tabName) {
 // ADS MANAGEMENT
 // ======================
 
-// Load all ads
-async function loadAds() {
+// Load the first page of ads, or the next one when append is true
+async function loadAds(append = false) {
     try {
-        const response = await fetch(`${API_BASE}/api/admin/ads?token=${adminToken}`);
+        let url = `${API_BASE}/api/admin/ads?token=${adminToken}`;
+        if (append && adsCursor) {
+            url += `&cursor=${encodeURIComponent(adsCursor)}`;
+        }
+        const response = await fetch(url);
 
         if (response.status === 403) {
             showNotification('Admin token noto\'g\'ri yoki muddati o\'tgan', 'error');
@@ -106,7 +123,9 @@ async function loadAds() {
         }
 
         const data = await response.json();
-        adsData = data.ads;
+        adsData = append ? adsData.concat(data.ads) : data.ads;
+        adsCursor = data.next_cursor;
+        loadMoreAds.classList.toggle('hidden', !adsCursor);
         renderAdsTable();
 
     } catch (error) {
@@ -221,7 +240,8 @@ window.deleteAd = async function (adId) {
 };
 
 // Refresh ads list
-refreshAds.addEventListener('click', loadAds);
+refreshAds.addEventListener('click', () => loadAds());
+loadMoreAds.addEventListener('click', () => loadAds(true));
 
 // ======================
 // STATISTICS
@@ -243,15 +263,64 @@ async function loadStats() {
         activeAds.textContent = data.stats.active_ads;
         totalConversions.textContent = data.stats.total_conversions;
 
-        // Update recent activity
-        renderRecentActivity(data.recent_conversions);
-
     } catch (error) {
         showNotification('Statistika yuklash xatosi', 'error');
         console.error(error);
     }
 }
 
+// Load one page of conversion history with the current filters
+async function loadConversions() {
+    const page = conversionCursors.length - 1;
+    const params = new URLSearchParams({ token: adminToken });
+    if (conversionCursors[page]) params.set('cursor', conversionCursors[page]);
+    if (filterType.value) params.set('type', filterType.value);
+    if (filterDateFrom.value) params.set('date_from', filterDateFrom.value);
+    if (filterDateTo.value) params.set('date_to', filterDateTo.value);
+    if (filterIp.value.trim()) params.set('ip', filterIp.value.trim());
+
+    try {
+        const response = await fetch(`${API_BASE}/api/admin/conversions?${params}`);
+        const data = await response.json();
+
+        if (!response.ok) {
+            throw new Error(data.error || 'Server xatosi');
+        }
+
+        nextConversionsCursor = data.next_cursor;
+        prevConversions.disabled = page === 0;
+        nextConversions.disabled = !nextConversionsCursor;
+        conversionsPage.textContent = `${page + 1}-sahifa`;
+        renderRecentActivity(data.conversions);
+
+    } catch (error) {
+        showNotification(error.message || 'Konvertatsiyalarni yuklash xatosi', 'error');
+        console.error(error);
+    }
+}
+
+conversionFilters.addEventListener('submit', function (e) {
+    e.preventDefault();
+    conversionCursors = [null];
+    loadConversions();
+});
+
+prevConversions.addEventListener('click', function () {
+    if (conversionCursors.length > 1) {
+        conversionCursors.pop();
+        loadConversions();
+    }
+});
+
+nextConversions.addEventListener('click', function () {
+    if (nextConversionsCursor) {
+        conversionCursors.push(nextConversionsCursor);
+        loadConversions();
+    }
+});
+
+const CONVERSION_TYPE_LABELS = { text: 'Matn', docx: 'DOCX', file: 'Fayl' };
+
 // Render recent activity
 function renderRecentActivity(conversions) {
     if (!conversions || conversions.length === 0) {
@@ -270,11 +339,11 @@ function renderRecentActivity(conversions) {
           <tr class="hover:bg-gray-50">
               <td class="px-6 py-4 whitespace-nowrap">
                   <span class="px-3 py-1 rounded-full text-sm font-medium ${conv.type === 'text' ? 'bg-blue-100 text-blue-800' : 'bg-purple-100 text-purple-800'}">
-                      ${conv.type === 'text' ? 'Matn' : 'DOCX'}
+                      ${CONVERSION_TYPE_LABELS[conv.type] || conv.type}
                   </span>
               </td>
               <td class="px-6 py-4">
-                  <div class="text-sm text-gray-900">${escapeHtml(conv.filename || 'Matn konvertatsiyasi')}</div>
+                  <div class="text-sm text-gray-900">${escapeHtml(conv.file_name || 'Matn konvertatsiyasi')}</div>
               </td>
               <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
                   ${new Date(conv.timestamp).toLocaleString('uz-UZ')}
@@ -470,6 +539,10 @@ document.addEventListener('DOMContentLoaded', function () {
     setInterval(() => {
         if (currentTab === 'stats') {
             loadStats();
+            // Only the first page moves; keep older pages where the admin left them
+            if (conversionCursors.length === 1) {
+                loadConversions();
+            }
         }
     }, 30000); // Every 30 seconds
 
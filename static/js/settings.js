@@ -150,10 +150,18 @@ deleteAllAds.addEventListener('click', async function () {
 
     // Get all ads first to confirm
     try {
-        const adsResponse = await fetch(`${API_BASE}/api/admin/ads?token=${adminToken}`);
-        if (!adsResponse.ok) throw new Error('Reklamalarni olish xatosi');
-
-        const adsData = await adsResponse.json();
+        // The list is paginated: follow next_cursor until the last page
+        const adsData = { ads: [] };
+        let cursor = null;
+        do {
+            const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+            const adsResponse = await fetch(`${API_BASE}/api/admin/ads?token=${adminToken}&limit=200${cursorParam}`);
+            if (!adsResponse.ok) throw new Error('Reklamalarni olish xatosi');
+
+            const page = await adsResponse.json();
+            adsData.ads.push(...page.ads);
+            cursor = page.next_cursor;
+        } while (cursor);
         const adCount = adsData.ads.length;
 
         if (adCount === 0) {
@@ -0,0 +1,191 @@
+/*
+ * translit.js - Uzbek Latin <-> Cyrillic conversion in the browser
+ * Generated by translit_js.py from converter.UzbekConverter. Do not edit.
+ */
+(function (root) {
+    'use strict';
+
+    const VERSION = "2f97cf269f50";
+    const LATIN_TO_CYRILLIC = [["sh", "ш"], ["ch", "ч"], ["ng", "нг"], ["yo", "ё"], ["ya", "я"], ["yu", "ю"], ["ye", "е"], ["g‘", "ғ"], ["g'", "ғ"], ["o‘", "ў"], ["o'", "ў"], ["a", "а"], ["b", "б"], ["d", "д"], ["e", "е"], ["f", "ф"], ["g", "г"], ["h", "ҳ"], ["i", "и"], ["j", "ж"], ["k", "к"], ["l", "л"], ["m", "м"], ["n", "н"], ["o", "о"], ["p", "п"], ["q", "қ"], ["r", "р"], ["s", "с"], ["t", "т"], ["u", "у"], ["v", "в"], ["x", "х"], ["y", "й"], ["z", "з"], ["Sh", "Ш"], ["Ch", "Ч"], ["Ng", "Нг"], ["Yo", "Ё"], ["Ya", "Я"], ["Yu", "Ю"], ["Ye", "Е"], ["G‘", "Ғ"], ["G'", "Ғ"], ["O‘", "Ў"], ["O'", "Ў"], ["A", "А"], ["B", "Б"], ["D", "Д"], ["E", "Е"], ["F", "Ф"], ["G", "Г"], ["H", "Ҳ"], ["I", "И"], ["J", "Ж"], ["K", "К"], ["L", "Л"], ["M", "М"], ["N", "Н"], ["O", "О"], ["P", "П"], ["Q", "Қ"], ["R", "Р"], ["S", "С"], ["T", "Т"], ["U", "У"], ["V", "В"], ["X", "Х"], ["Y", "Й"], ["Z", "З"]];
+    const CYRILLIC_TO_LATIN = [["нг", "ng"], ["ў", "o'"], ["ғ", "g'"], ["ё", "yo"], ["я", "ya"], ["ю", "yu"], ["е", "ye"], ["ш", "sh"], ["ч", "ch"], ["а", "a"], ["б", "b"], ["д", "d"], ["е", "e"], ["ф", "f"], ["г", "g"], ["ҳ", "h"], ["и", "i"], ["ж", "j"], ["к", "k"], ["л", "l"], ["м", "m"], ["н", "n"], ["о", "o"], ["п", "p"], ["қ", "q"], ["р", "r"], ["с", "s"], ["т", "t"], ["у", "u"], ["в", "v"], ["х", "x"], ["й", "y"], ["з", "z"], ["Нг", "Ng"], ["Ў", "O'"], ["Ғ", "G'"], ["Ё", "Yo"], ["Я", "Ya"], ["Ю", "Yu"], ["Е", "Ye"], ["Ш", "Sh"], ["Ч", "Ch"], ["А", "A"], ["Б", "B"], ["Д", "D"], ["Е", "E"], ["Ф", "F"], ["Г", "G"], ["Ҳ", "H"], ["И", "I"], ["Ж", "J"], ["К", "K"], ["Л", "L"], ["М", "M"], ["Н", "N"], ["О", "O"], ["П", "P"], ["Қ", "Q"], ["Р", "R"], ["С", "S"], ["Т", "T"], ["У", "U"], ["В", "V"], ["Х", "X"], ["Й", "Y"], ["З", "Z"]];
+    const STRIPPED_MARKS = ["'", "`", "‘", "’"];
+    const CYRILLIC_PATTERN = new RegExp("[а-яёўғҳқА-ЯЁЎҒҲҚ]", 'g');
+    const LATIN_PATTERN = new RegExp("[a-zA-Z]", 'g');
+    const WORD_PATTERN = new RegExp("[a-zA-Z\\u0400-\\u04FF]+(?:['`‘’][a-zA-Z\\u0400-\\u04FF]+)*", 'g');
+    const CYRILLIC_VOWELS = "аеёиоуўэюя";
+    const LEXICON = [["акция", "aksiya"], ["актёр", "aktyor"], ["альбом", "albom"], ["ансамбль", "ansambl"], ["апрель", "aprel"], ["аэропорт", "aeroport"], ["больница", "bolnitsa"], ["вертолёт", "vertolyot"], ["декабрь", "dekabr"], ["дирекция", "direksiya"], ["инновация", "innovatsiya"], ["информация", "informatsiya"], ["июль", "iyul"], ["июнь", "iyun"], ["календарь", "kalendar"], ["компьютер", "kompyuter"], ["конституция", "konstitutsiya"], ["концерт", "konsert"], ["лекция", "leksiya"], ["медаль", "medal"], ["мебель", "mebel"], ["милиция", "militsiya"], ["модель", "model"], ["объект", "obyekt"], ["объектив", "obyektiv"], ["октябрь", "oktyabr"], ["организация", "organizatsiya"], ["отель", "otel"], ["пальто", "palto"], ["подъезд", "podyezd"], ["позиция", "pozitsiya"], ["полиция", "politsiya"], ["портфель", "portfel"], ["премьер", "premyer"], ["принцип", "prinsip"], ["район", "rayon"], ["реакция", "reaksiya"], ["революция", "revolyutsiya"], ["роль", "rol"], ["секция", "seksiya"], ["сентябрь", "sentyabr"], ["станция", "stansiya"], ["субъект", "subyekt"], ["съезд", "syezd"], ["факультет", "fakultet"], ["февраль", "fevral"], ["федерация", "federatsiya"], ["фильм", "film"], ["цемент", "sement"], ["цирк", "sirk"], ["январь", "yanvar"]];
+    const WORD_CACHE_SIZE = 50000;
+
+    const MARKS = STRIPPED_MARKS.join('');
+    const SEPARATED_SH = new RegExp('([sS])[' + MARKS + ']([hH])', 'g');
+    const O_G_MARK = new RegExp('([oOgG])[' + MARKS + ']', 'g');
+    const INNER_MARK = new RegExp('[' + MARKS + ']', 'g');
+    const LATIN_SPECIALS = { s: 'с', S: 'С', h: 'ҳ', H: 'Ҳ', o: 'ў', O: 'Ў', g: 'ғ', G: 'Ғ' };
+    const TO_LATIN = new Map(LEXICON.map(([cyrillic, latin]) => [cyrillic, latin]));
+    const TO_CYRILLIC = new Map(LEXICON.map(([cyrillic, latin]) => [latin, cyrillic]));
+    const wordCache = new Map();
+
+    // Same semantics as Python str.replace: non-overlapping, left to right
+    function replaceAll(text, from, to) {
+        return text.split(from).join(to);
+    }
+
+    function countMatches(text, pattern) {
+        const matches = text.match(pattern);
+        return matches ? matches.length : 0;
+    }
+
+    function detectAlphabet(text) {
+        return countMatches(text, CYRILLIC_PATTERN) > countMatches(text, LATIN_PATTERN) ? 'cyrillic' : 'latin';
+    }
+
+    function latinToCyrillic(text) {
+        for (const mark of STRIPPED_MARKS) {
+            text = replaceAll(text, mark, '');
+        }
+        for (const [latin, cyrillic] of LATIN_TO_CYRILLIC) {
+            text = replaceAll(text, latin, cyrillic);
+        }
+        return text;
+    }
+
+    function cyrillicToLatin(text) {
+        for (const [cyrillic, latin] of CYRILLIC_TO_LATIN) {
+            text = replaceAll(text, cyrillic, latin);
+        }
+        return text;
+    }
+
+    function isUpper(text) {
+        return text === text.toUpperCase() && text !== text.toLowerCase();
+    }
+
+    function capitalize(text) {
+        return text.charAt(0).toUpperCase() + text.slice(1).toLowerCase();
+    }
+
+    function matchCase(source, converted) {
+        if (source.length > 1 && isUpper(source)) {
+            return converted.toUpperCase();
+        }
+        if (isUpper(source.charAt(0))) {
+            return converted.charAt(0).toUpperCase() + converted.slice(1);
+        }
+        return converted;
+    }
+
+    function wordToLatin(word) {
+        const exception = TO_LATIN.get(word.toLowerCase());
+        if (exception !== undefined) {
+            return matchCase(word, exception);
+        }
+
+        let parts = '';
+        let previous = '';
+        for (const char of word) {
+            const current = char.toLowerCase();
+            let latin;
+            if (current === 'е') {
+                latin = !previous || CYRILLIC_VOWELS.includes(previous) ? 'ye' : 'e';
+            } else if (current === 'ц') {
+                latin = previous && CYRILLIC_VOWELS.includes(previous) ? 'ts' : 's';
+            } else if (current === 'ь') {
+                latin = '';
+            } else if (current === 'ъ') {
+                latin = "'";
+            } else if (current === 'э') {
+                latin = 'e';
+            } else {
+                parts += char;
+                previous = current;
+                continue;
+            }
+            if (isUpper(char)) {
+                latin = word.length > 1 && isUpper(word) ? latin.toUpperCase() : capitalize(latin);
+            }
+            parts += latin;
+            previous = current;
+        }
+        return cyrillicToLatin(parts);
+    }
+
+    function wordToCyrillic(word) {
+        const exception = TO_CYRILLIC.get(word.toLowerCase().replace(INNER_MARK, "'"));
+        if (exception !== undefined) {
+            return matchCase(word, exception);
+        }
+
+        word = word.replace(SEPARATED_SH, (match, s, h) => LATIN_SPECIALS[s] + LATIN_SPECIALS[h]);
+        word = word.replace(O_G_MARK, (match, letter) => LATIN_SPECIALS[letter]);
+        word = word.replace(INNER_MARK, 'ъ');
+        if (word.charAt(0) === 'e' || word.charAt(0) === 'E') {
+            word = (word.charAt(0) === 'E' ? 'Э' : 'э') + word.slice(1);
+        }
+        return latinToCyrillic(word);
+    }
+
+    function convertWord(word, direction) {
+        const key = direction + ':' + word;
+        let converted = wordCache.get(key);
+        if (converted === undefined) {
+            converted = direction === 'latin_to_cyrillic' ? wordToCyrillic(word) : wordToLatin(word);
+            if (wordCache.size >= WORD_CACHE_SIZE) {
+                // Drop the older half (insertion order), like the server memo
+                let drop = wordCache.size >> 1;
+                for (const oldKey of wordCache.keys()) {
+                    if (drop-- <= 0) break;
+                    wordCache.delete(oldKey);
+                }
+            }
+            wordCache.set(key, converted);
+        }
+        return converted;
+    }
+
+    function convertWords(text, direction) {
+        let converted = text.replace(WORD_PATTERN, (word) => convertWord(word, direction));
+        if (direction === 'latin_to_cyrillic') {
+            for (const mark of STRIPPED_MARKS) {
+                converted = replaceAll(converted, mark, '');
+            }
+        }
+        return converted;
+    }
+
+    function resolveDirection(text, direction) {
+        if (direction === 'latin_to_cyrillic' || direction === 'cyrillic_to_latin') {
+            return direction;
+        }
+        return detectAlphabet(text) === 'latin' ? 'latin_to_cyrillic' : 'cyrillic_to_latin';
+    }
+
+    function convert(text, direction) {
+        return convertWords(text, direction);
+    }
+
+    // Mirrors UzbekConverter.convert_text: returns {converted, direction}
+    function convertText(text, direction = 'auto') {
+        if (!text.trim()) {
+            return { converted: text, direction: 'none' };
+        }
+        const resolved = resolveDirection(text, direction);
+        return { converted: convert(text, resolved), direction: resolved };
+    }
+
+    const Translit = {
+        VERSION,
+        detectAlphabet,
+        latinToCyrillic,
+        cyrillicToLatin,
+        resolveDirection,
+        convertWords,
+        convert,
+        convertText
+    };
+
+    if (typeof module === 'object' && module.exports) {
+        module.exports = Translit;
+    } else {
+        root.Translit = Translit;
+    }
+})(this);
@@ -6,7 +6,12 @@ const API_BASE = (
 
 let conversionCount = 0;
 let currentAd = null;
-let currentFile = null;
+let currentFiles = [];
+let blobDownloadUrl = null;
+// Must match MAX_BATCH_FILES, ALLOWED_TEXT_EXTENSIONS and MAX_TEXT_FILE_SIZE in config.py
+const MAX_BATCH_FILES = 50;
+const TEXT_FILE_EXTENSIONS = ['.txt', '.srt', '.csv'];
+const MAX_TEXT_FILE_SIZE = 50 * 1024 * 1024;
 let adModalShown = false;
 
 // DOM Elements
@@ -43,18 +48,189 @@ const adModal = document.getElementById('adModal');
 const closeAdBtn = document.getElementById('closeAd');
 const adLink = document.getElementById('adLink');
 const adImage = document.getElementById('adImage');
+const adImageWebp = document.getElementById('adImageWebp');
 const adTitle = document.getElementById('adTitle');
 
 // ======================
 // TEXT CONVERSION
 // ======================
 
-// Update character count
+// Browser-side converter (static/js/translit.js); the server API is the fallback
+const localConverter = window.Translit || null;
+// Longer texts are converted live over the WebSocket: the local converter
+// redoes the whole text on every keystroke (about 6ms per 50,000 characters),
+// the server re-converts only the edited block
+const LOCAL_LIVE_MAX_CHARS = 50000;
+let liveDirection = 'auto';
+let liveFrame = null;
+
+// Update character count and convert as you type
 inputText.addEventListener('input', function() {
     const count = this.value.length;
     charCount.textContent = count;
+
+    if (liveFrame) {
+        cancelAnimationFrame(liveFrame);
+    }
+    liveFrame = requestAnimationFrame(function() {
+        liveFrame = null;
+        if (liveIsLocal()) {
+            convertLive();
+        } else {
+            sendLiveEdit();
+        }
+    });
 });
 
+function liveIsLocal() {
+    return localConverter !== null
+        && (inputText.value.length < LOCAL_LIVE_MAX_CHARS || liveDisabled || !('WebSocket' in window));
+}
+
+// Live conversion (local only, no notifications or counters)
+function convertLive() {
+    const text = inputText.value.trim();
+    if (!text) {
+        outputText.innerHTML = '<p class="text-gray-500 italic">Natija shu yerda ko\'rinadi...</p>';
+        resultCharCount.textContent = '0';
+        return;
+    }
+
+    const data = localConverter.convertText(text, liveDirection);
+    renderResult(text, data.converted, data.direction);
+}
+
+// Server-side live conversion over a WebSocket (long texts, or no translit.js):
+// only the edited range is sent and the server answers with a patch
+let liveSocket = null;
+let liveSource = '';
+let liveConverted = '';
+let liveErrors = 0;  // consecutive errors; live updates stop after MAX_LIVE_ERRORS
+let liveDisabled = false;
+let liveRejectedLength = Infinity;  // text at least this long was too large
+let liveResyncPending = false;  // edits wait until the whole text is sent again
+const MAX_LIVE_ERRORS = 3;
+
+function connectLiveSocket() {
+    if (liveSocket || liveDisabled || !('WebSocket' in window)) {
+        return;
+    }
+    const base = API_BASE || location.origin;
+    liveSocket = new WebSocket(base.replace(/^http/, 'ws') + '/ws/convert');
+
+    liveSocket.addEventListener('open', function() {
+        sendLiveInit();
+    });
+
+    liveSocket.addEventListener('message', function(event) {
+        const message = JSON.parse(event.data);
+        if (message.type === 'reset') {
+            liveConverted = message.text;
+        } else if (message.type === 'patch') {
+            liveConverted = liveConverted.slice(0, message.offset)
+                + message.insert
+                + liveConverted.slice(message.offset + message.delete);
+        } else if (message.code === 'too_large') {
+            // Retrying cannot help; resume once the text is shorter
+            liveRejectedLength = liveSource.length;
+            showNotification('Matn juda katta: natija uchun konvert tugmasidan foydalaning', 'warning');
+            return;
+        } else {
+            liveErrors++;
+            if (liveErrors >= MAX_LIVE_ERRORS) {
+                // Keep failing: stop live updates, the convert buttons use HTTP
+                liveDisabled = true;
+                liveSocket.close();
+                return;
+            }
+            // Out of sync or rate limited: send the whole text again after a back-off
+            liveResyncPending = true;
+            const delay = Math.max(250 * 2 ** liveErrors, (message.retry_after || 0) * 1000);
+            setTimeout(function() {
+                if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+                    sendLiveInit();
+                }
+            }, delay);
+            return;
+        }
+        liveErrors = 0;
+        renderLive(message.direction);
+    });
+
+    liveSocket.addEventListener('close', function() {
+        liveSocket = null;
+        liveResyncPending = false;
+    });
+}
+
+function sendLiveInit() {
+    liveResyncPending = false;
+    liveSource = inputText.value;
+    liveSocket.send(JSON.stringify({ type: 'init', text: liveSource, direction: liveDirection }));
+}
+
+function sendLiveEdit() {
+    if (liveDisabled || liveResyncPending) {
+        return;
+    }
+    if (inputText.value.length >= liveRejectedLength) {
+        return;
+    }
+    if (liveRejectedLength !== Infinity) {
+        // Short enough again: start over with the whole text
+        liveRejectedLength = Infinity;
+        if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+            sendLiveInit();
+            return;
+        }
+    }
+    if (!liveSocket) {
+        connectLiveSocket();
+        return;
+    }
+    if (liveSocket.readyState !== WebSocket.OPEN) {
+        return;
+    }
+
+    // Smallest edit turning the previous text into the current one
+    const text = inputText.value;
+    let start = 0;
+    const maxStart = Math.min(text.length, liveSource.length);
+    while (start < maxStart && text.charCodeAt(start) === liveSource.charCodeAt(start)) {
+        start++;
+    }
+    let end = 0;
+    const maxEnd = maxStart - start;
+    while (end < maxEnd
+        && text.charCodeAt(text.length - 1 - end) === liveSource.charCodeAt(liveSource.length - 1 - end)) {
+        end++;
+    }
+    if (start === text.length && start === liveSource.length) {
+        return;
+    }
+
+    liveSocket.send(JSON.stringify({
+        type: 'edit',
+        offset: start,
+        delete: liveSource.length - end - start,
+        insert: text.slice(start, text.length - end)
+    }));
+    liveSource = text;
+}
+
+function renderLive(direction) {
+    if (liveIsLocal()) {
+        // A late answer after the text became short enough to convert locally
+        return;
+    }
+    if (!liveSource.trim()) {
+        outputText.innerHTML = '<p class="text-gray-500 italic">Natija shu yerda ko\'rinadi...</p>';
+        resultCharCount.textContent = '0';
+        return;
+    }
+    renderResult(liveSource, liveConverted, direction);
+}
+
 // Detect alphabet
 detectBtn.addEventListener('click', async function() {
     const text = inputText.value.trim();
@@ -64,21 +240,27 @@ detectBtn.addEventListener('click', async function() {
     }
 
     try {
-        const response = await fetch(`${API_BASE}/api/convert-text`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/x-www-form-urlencoded',
-            },
-            body: new URLSearchParams({
-                text: text
-            })
-        });
+        let data;
+        if (localConverter) {
+            data = localConverter.convertText(text);
+        } else {
+            const response = await fetch(`${API_BASE}/api/convert-text`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/x-www-form-urlencoded',
+                },
+                body: new URLSearchParams({
+                    text: text,
+                    format: 'compact'
+                })
+            });
 
-        if (!response.ok) {
-            throw new Error('Server xatosi');
-        }
+            if (!response.ok) {
+                throw new Error('Server xatosi');
+            }
 
-        const data = await response.json();
+            data = await response.json();
+        }
         let message = '';
         
         if (data.direction === 'latin_to_cyrillic') {
@@ -114,6 +296,21 @@ async function convertText(direction) {
         return;
     }
 
+    // Live updates (local or over the WebSocket) follow the chosen direction
+    liveDirection = direction;
+    if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+        sendLiveInit();
+    }
+
+    // Convert locally when the browser converter is loaded
+    if (localConverter) {
+        const data = localConverter.convertText(text, direction);
+        renderResult(text, data.converted, data.direction);
+        incrementConversionCount();
+        showNotification('Matn muvaffaqiyatli konvert qilindi!', 'success');
+        return;
+    }
+
     // Show loading
     outputText.innerHTML = `
         <div class="flex items-center justify-center h-32">
@@ -129,7 +326,8 @@ async function convertText(direction) {
                 'Content-Type': 'application/x-www-form-urlencoded',
             },
             body: new URLSearchParams({
-                text: text
+                text: text,
+                format: 'compact'  // no echo of the input we already have
             })
         });
 
@@ -140,25 +338,9 @@ async function convertText(direction) {
         const data = await response.json();
         
         // Display result
-        outputText.innerHTML = `
-            <div class="space-y-4">
-                <div>
-                    <p class="text-sm text-gray-500 mb-1">Asl matn:</p>
-                    <p class="text-gray-700 bg-gray-100 p-3 rounded">${escapeHtml(data.original)}</p>
-                </div>
-                <div>
-                    <p class="text-sm text-gray-500 mb-1">Konvertatsiya natijasi:</p>
-                    <p class="text-gray-800 bg-blue-50 p-3 rounded font-medium">${escapeHtml(data.converted)}</p>
-                </div>
-                <div class="text-sm text-gray-500">
-                    <i class="fas fa-info-circle mr-1"></i>
-                    ${data.direction === 'latin_to_cyrillic' ? 'Lotin → Kirill' : 'Kirill → Lotin'}
-                </div>
-            </div>
-        `;
+        renderResult(text, data.converted, data.direction);
 
         // Update counters
-        resultCharCount.textContent = data.converted.length;
         incrementConversionCount();
         
         // Show success notification
@@ -175,6 +357,27 @@ async function convertText(direction) {
     }
 }
 
+// Display conversion result
+function renderResult(original, converted, direction) {
+    outputText.innerHTML = `
+        <div class="space-y-4">
+            <div>
+                <p class="text-sm text-gray-500 mb-1">Asl matn:</p>
+                <p class="text-gray-700 bg-gray-100 p-3 rounded">${escapeHtml(original)}</p>
+            </div>
+            <div>
+                <p class="text-sm text-gray-500 mb-1">Konvertatsiya natijasi:</p>
+                <p class="text-gray-800 bg-blue-50 p-3 rounded font-medium">${escapeHtml(converted)}</p>
+            </div>
+            <div class="text-sm text-gray-500">
+                <i class="fas fa-info-circle mr-1"></i>
+                ${direction === 'latin_to_cyrillic' ? 'Lotin → Kirill' : 'Kirill → Lotin'}
+            </div>
+        </div>
+    `;
+    resultCharCount.textContent = converted.length;
+}
+
 // Copy to clipboard
 copyBtn.addEventListener('click', function() {
     const resultText = outputText.innerText;
@@ -231,36 +434,54 @@ fileUploadArea.addEventListener('drop', function(e) {
     this.style.backgroundColor = 'transparent';
     
     if (e.dataTransfer.files.length) {
-        handleFileSelect(e.dataTransfer.files[0]);
+        handleFileSelect(e.dataTransfer.files);
     }
 });
 
 // File input change
 docxFileInput.addEventListener('change', function(e) {
     if (this.files.length) {
-        handleFileSelect(this.files[0]);
+        handleFileSelect(this.files);
     }
 });
 
-// Handle file selection
-function handleFileSelect(file) {
-    // Validate file type
-    if (!file.name.toLowerCase().endsWith('.docx')) {
-        showNotification('Faqat .docx fayllarni yuklash mumkin', 'error');
+// Handle file selection (one file or a batch)
+function handleFileSelect(files) {
+    files = Array.from(files);
+
+    if (files.length > MAX_BATCH_FILES) {
+        showNotification(`Bir vaqtda ${MAX_BATCH_FILES} tadan ortiq fayl yuklab bo'lmaydi`, 'error');
         return;
     }
 
-    // Validate file size (5MB)
-    if (file.size > 5 * 1024 * 1024) {
-        showNotification('Fayl hajmi 5MB dan oshmasligi kerak', 'error');
-        return;
+    // A single .txt/.srt/.csv file is converted by the streaming endpoint
+    if (files.length === 1 && isTextFile(files[0])) {
+        if (files[0].size > MAX_TEXT_FILE_SIZE) {
+            showNotification('Fayl hajmi 50MB dan oshmasligi kerak', 'error');
+            return;
+        }
+    } else {
+        for (const file of files) {
+            // Validate file type
+            if (!file.name.toLowerCase().endsWith('.docx')) {
+                showNotification('Faqat .docx fayllarni yuklash mumkin', 'error');
+                return;
+            }
+
+            // Validate file size (5MB)
+            if (file.size > 5 * 1024 * 1024) {
+                showNotification('Fayl hajmi 5MB dan oshmasligi kerak', 'error');
+                return;
+            }
+        }
     }
 
-    currentFile = file;
+    currentFiles = files;
     
     // Update UI
-    fileName.textContent = file.name;
-    fileSize.textContent = formatFileSize(file.size);
+    const totalSize = files.reduce((sum, file) => sum + file.size, 0);
+    fileName.textContent = files.length === 1 ? files[0].name : `${files.length} ta fayl`;
+    fileSize.textContent = formatFileSize(totalSize);
     selectedFileInfo.classList.remove('hidden');
     convertDocxBtn.disabled = false;
     convertDocxBtn.innerHTML = '<i class="fas fa-sync-alt mr-2"></i><span>Faylni konvert qilish</span>';
@@ -268,9 +489,14 @@ function handleFileSelect(file) {
     showNotification('Fayl muvaffaqiyatli yuklandi', 'success');
 }
 
+function isTextFile(file) {
+    const name = file.name.toLowerCase();
+    return TEXT_FILE_EXTENSIONS.some(extension => name.endsWith(extension));
+}
+
 // Remove file
 removeFileBtn.addEventListener('click', function() {
-    currentFile = null;
+    currentFiles = [];
     docxFileInput.value = '';
     selectedFileInfo.classList.add('hidden');
     convertDocxBtn.disabled = true;
@@ -278,7 +504,7 @@ removeFileBtn.addEventListener('click', function() {
 
 // Convert DOCX file
 convertDocxBtn.addEventListener('click', async function() {
-    if (!currentFile) {
+    if (!currentFiles.length) {
         showNotification('Fayl tanlang', 'warning');
         return;
     }
@@ -293,8 +519,17 @@ convertDocxBtn.addEventListener('click', async function() {
     `;
 
     try {
+        if (currentFiles.length > 1) {
+            await convertDocxBatch(currentFiles);
+            return;
+        }
+        if (isTextFile(currentFiles[0])) {
+            await convertTextFile(currentFiles[0]);
+            return;
+        }
+
         const formData = new FormData();
-        formData.append('file', currentFile);
+        formData.append('file', currentFiles[0]);
         formData.append('direction', docxDirection.value);
 
         const response = await fetch(`${API_BASE}/api/upload-docx`, {
@@ -333,9 +568,63 @@ convertDocxBtn.addEventListener('click', async function() {
     }
 });
 
+// Convert several DOCX files and offer the streamed ZIP for download
+async function convertDocxBatch(files) {
+    const formData = new FormData();
+    for (const file of files) {
+        formData.append('files', file);
+    }
+    formData.append('direction', docxDirection.value);
+
+    const response = await fetch(`${API_BASE}/api/upload-docx-batch`, {
+        method: 'POST',
+        body: formData
+    });
+
+    if (!response.ok) {
+        throw new Error(await response.text());
+    }
+
+    showBlobDownload(await response.blob(), 'latinify_converted.zip', `${files.length} ta fayl konvert qilindi`);
+    showNotification('DOCX fayllar muvaffaqiyatli konvert qilindi!', 'success');
+}
+
+// Convert a .txt/.srt/.csv file; the server streams the converted file back
+async function convertTextFile(file) {
+    const formData = new FormData();
+    formData.append('file', file);
+    formData.append('direction', docxDirection.value);
+
+    const response = await fetch(`${API_BASE}/api/convert-file`, {
+        method: 'POST',
+        body: formData
+    });
+
+    if (!response.ok) {
+        throw new Error(await response.text());
+    }
+
+    showBlobDownload(await response.blob(), `latinify_${file.name}`, 'Fayl muvaffaqiyatli konvert qilindi');
+    showNotification('Fayl muvaffaqiyatli konvert qilindi!', 'success');
+}
+
+function showBlobDownload(blob, filename, message) {
+    if (blobDownloadUrl) {
+        URL.revokeObjectURL(blobDownloadUrl);
+    }
+    blobDownloadUrl = URL.createObjectURL(blob);
+
+    resultMessage.textContent = message;
+    conversionResult.classList.remove('hidden');
+    downloadBtn.href = blobDownloadUrl;
+    downloadBtn.download = filename;
+
+    incrementConversionCount();
+}
+
 // Convert another file
 convertAnotherBtn.addEventListener('click', function() {
-    currentFile = null;
+    currentFiles = [];
     docxFileInput.value = '';
     selectedFileInfo.classList.add('hidden');
     conversionResult.classList.add('hidden');
@@ -399,6 +688,10 @@ function showAdModal(ad) {
         ? img
         : location.origin + img;
 
+    // Resized variants: the browser picks the smallest one that fits
+    setSrcset(adImageWebp, ad.srcset);
+    setSrcset(adImage, ad.srcset_jpeg);
+
     adImage.alt = ad.title || 'Reklama';
     adTitle.textContent = ad.title || '';
 
@@ -415,6 +708,14 @@ function showAdModal(ad) {
     document.body.style.overflow = 'hidden';
 }
 
+function setSrcset(element, srcset) {
+    if (srcset) {
+        element.srcset = srcset;
+    } else {
+        element.removeAttribute('srcset');
+    }
+}
+
 // Close ad modal
 closeAdBtn.addEventListener('click', function (e) {
     e.preventDefault();
@@ -0,0 +1,199 @@
+"""
+static_assets.py - Cached, fingerprinted and compressed static file delivery
+"""
+
+import os
+import gzip
+import hashlib
+import threading
+from mimetypes import guess_type
+from typing import Dict, Optional, Sequence
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip variants are generated without it
+    brotli = None
+
+# Text assets worth compressing (images are already compressed)
+COMPRESSIBLE_EXTENSIONS = {".js", ".css", ".html", ".svg", ".json", ".txt", ".map"}
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Uploaded ad images get a unique name and are never modified in place
+IMMUTABLE_PREFIXES = ("ads/",)
+
+
+def negotiate_encoding(accept_encoding: str, available: Sequence[str]) -> Optional[str]:
+    """
+    Best of the available encodings (in order of preference) that Accept-Encoding
+    allows with a non-zero q-value; None means send the identity body
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class _Asset:
+    """
+    Precomputed metadata and compressed variants of one static file
+    """
+
+    def __init__(self, full_path: str, stat_result: os.stat_result):
+        with open(full_path, "rb") as f:
+            content = f.read()
+        self.mtime = stat_result.st_mtime_ns
+        self.size = stat_result.st_size
+        self.digest = hashlib.sha256(content).hexdigest()[:12]
+        self.etag = f'"{self.digest}"'
+        self.variants: Dict[str, bytes] = {}
+
+        extension = os.path.splitext(full_path)[1].lower()
+        if extension in COMPRESSIBLE_EXTENSIONS:
+            self.variants["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(content, quality=11)
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with content-hash fingerprints, long-lived caching,
+    content-hash ETags and precompressed gzip/brotli variants
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._assets: Dict[str, _Asset] = {}
+        self._lock = threading.Lock()
+
+    def precompress(self):
+        """
+        Fingerprint and compress every file up front (called at startup)
+        """
+        for directory in self.all_directories:
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    full_path = os.path.join(root, filename)
+                    try:
+                        self._get_asset(full_path, os.stat(full_path))
+                    except OSError:
+                        continue
+
+    def _get_asset(self, full_path: str, stat_result: os.stat_result) -> _Asset:
+        asset = self._assets.get(full_path)
+        if asset is None or asset.mtime != stat_result.st_mtime_ns or asset.size != stat_result.st_size:
+            asset = _Asset(full_path, stat_result)
+            with self._lock:
+                self._assets[full_path] = asset
+        return asset
+
+    def fingerprint(self, path: str) -> Optional[str]:
+        """
+        Short content hash of a file relative to the static directory
+        """
+        full_path, stat_result = self.lookup_path(os.path.normpath(path))
+        if not stat_result:
+            return None
+        return self._get_asset(full_path, stat_result).digest
+
+    def url(self, path: str) -> str:
+        """
+        Fingerprinted URL for templates, e.g. /static/js/user.js?v=3f2a...
+        """
+        digest = self.fingerprint(path)
+        if digest is None:
+            return f"/static/{path}"
+        return f"/static/{path}?v={digest}"
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        asset = self._get_asset(full_path, stat_result)
+        relpath = os.path.relpath(full_path, self.directory).replace(os.sep, "/") if self.directory else ""
+
+        # Fingerprinted URLs never change content, everything else revalidates
+        version = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("v", [None])[0]
+        if version == asset.digest or relpath.startswith(IMMUTABLE_PREFIXES):
+            cache_control = IMMUTABLE_CACHE
+        else:
+            cache_control = REVALIDATE_CACHE
+
+        encoding = None
+        if asset.variants:
+            encoding = negotiate_encoding(
+                request_headers.get("accept-encoding", ""),
+                [candidate for candidate in ("br", "gzip") if candidate in asset.variants]
+            )
+
+        etag = asset.etag if encoding is None else f'"{asset.digest}-{encoding}"'
+        headers = {"cache-control": cache_control, "etag": etag}
+        if asset.variants:
+            headers["vary"] = "Accept-Encoding"
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return NotModifiedResponse(Headers(headers))
+
+        if encoding is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers.update(headers)
+            return response
+
+        headers["content-encoding"] = encoding
+        content = asset.variants[encoding]
+        response = Response(
+            content=content if scope["method"] != "HEAD" else b"",
+            status_code=status_code,
+            headers=headers,
+            media_type=guess_type(str(full_path))[0] or "text/plain",
+        )
+        response.headers["content-length"] = str(len(content))
+        return response
+
+
+class PathGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware limited to selected path prefixes, so binary downloads
+    and streamed files keep their exact bytes and headers
+    """
+
+    def __init__(self, app: ASGIApp, paths: Sequence[str], minimum_size: int = 500, compresslevel: int = 6):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.paths):
+            await super().__call__(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,20 @@
+import os
+import shutil
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def app_dir(tmp_path_factory):
+    # A private copy of the app, so the test database and uploads stay out of the tree
+    app_dir = str(tmp_path_factory.mktemp("app"))
+    for name in os.listdir(ROOT):
+        if name.endswith(".py"):
+            shutil.copy(os.path.join(ROOT, name), app_dir)
+    for name in ("templates", "static"):
+        shutil.copytree(os.path.join(ROOT, name), os.path.join(app_dir, name), ignore=shutil.ignore_patterns("ads"))
+    os.makedirs(os.path.join(app_dir, "data"))
+    shutil.copy(os.path.join(ROOT, "data", "lexicon.tsv"), os.path.join(app_dir, "data"))
+    return app_dir
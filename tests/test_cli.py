@@ -0,0 +1,27 @@
+"""
+cli.py: legacy encodings are read and failed conversions leave no output
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cli  # noqa: E402
+
+
+def test_convert_tree(tmp_path):
+    source = tmp_path / "in"
+    source.mkdir()
+    (source / "cp1251.txt").write_bytes("Салом дунё\n".encode("cp1251"))
+    (source / "utf16.txt").write_bytes("Салом дунё\n".encode("utf-16"))
+    (source / "broken.txt").write_bytes(b"salom " * 20000 + b"\xff\xfe")
+    (source / "broken.docx").write_bytes(b"not a zip")
+    output = tmp_path / "out"
+
+    stats = cli.convert_tree(str(source), str(output), jobs=1)
+
+    assert (stats["converted"], stats["failed"]) == (2, 2)
+    assert (output / "cp1251.txt").read_text(encoding="utf-8") == "Salom dunyo\n"
+    assert (output / "utf16.txt").read_text(encoding="utf-8") == "Salom dunyo\n"
+    assert sorted(os.listdir(output)) == ["cp1251.txt", "utf16.txt"]
@@ -0,0 +1,74 @@
+"""
+DownloadResponse: ranges, conditional requests and one-shot completion
+"""
+
+import os
+import sys
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloads import DownloadResponse, RangeNotSatisfiable, parse_range  # noqa: E402
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "converted.docx"
+    path.write_bytes(CONTENT)
+    completed = []
+
+    async def on_complete():
+        completed.append(True)
+
+    async def download(request):
+        return DownloadResponse(
+            str(path),
+            filename="converted.docx",
+            etag='"abc"',
+            last_modified=0,
+            media_type="application/octet-stream",
+            on_complete=on_complete,
+        )
+
+    app = Starlette(routes=[Route("/download", download, methods=["GET", "HEAD"])])
+    with TestClient(app) as test_client:
+        test_client.completed = completed
+        yield test_client
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=10-19", 100) == (10, 19)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=0-5,10-20", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+def test_full_download_completes(client):
+    response = client.get("/download")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert client.completed == [True]
+
+
+def test_range_reaching_last_byte_does_not_complete(client):
+    response = client.get("/download", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-10:]
+    assert response.headers["content-range"] == f"bytes {len(CONTENT) - 10}-{len(CONTENT) - 1}/{len(CONTENT)}"
+    assert client.completed == []
+
+
+def test_conditional_and_unsatisfiable(client):
+    assert client.get("/download", headers={"If-None-Match": '"abc"'}).status_code == 304
+    assert client.get("/download", headers={"Range": f"bytes={len(CONTENT)}-"}).status_code == 416
+    assert client.head("/download").content == b""
+    assert client.completed == []
@@ -0,0 +1,62 @@
+"""
+/ws/convert: incremental patches, per-message rate limiting and the per-client socket cap
+"""
+
+import os
+import sys
+import subprocess
+
+LIVE_CONVERT_SCRIPT = """
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+
+with TestClient(main.app) as client:
+    with client.websocket_connect("/ws/convert") as socket:
+        socket.send_json({"type": "init", "text": "salom dunyo", "direction": "auto"})
+        reset = socket.receive_json()
+        assert (reset["type"], reset["text"], reset["direction"]) == ("reset", "салом дунё", "latin_to_cyrillic")
+
+        socket.send_json({"type": "edit", "offset": 11, "delete": 0, "insert": " shahar"})
+        patch = socket.receive_json()
+        assert patch["type"] == "patch"
+        converted = reset["text"][:patch["offset"]] + patch["insert"] + reset["text"][patch["offset"] + patch["delete"]:]
+        assert converted == "салом дунё шаҳар"
+
+        socket.send_json({"type": "edit", "offset": 1000, "delete": 0, "insert": "x"})
+        assert socket.receive_json()["code"] == "out_of_sync"
+
+        # An empty bucket drops messages until it refills
+        main.rate_limiter.capacity = 1
+        main.rate_limiter.rate = 0.1
+        main.rate_limiter.buckets._buckets.clear()
+        codes = []
+        for _ in range(10):
+            socket.send_json({"type": "init", "text": "salom", "direction": "auto"})
+            codes.append(socket.receive_json().get("code"))
+        assert codes[0] is None
+        assert "rate_limited" in codes
+
+    # Sockets per client IP are capped; the next handshake is refused
+    limit = main.config.RATE_LIMIT_ROUTES["/ws/convert"]["max_per_client"]
+    sockets = [client.websocket_connect("/ws/convert").__enter__() for _ in range(limit)]
+    try:
+        client.websocket_connect("/ws/convert").__enter__()
+        raise AssertionError("socket over the cap was accepted")
+    except WebSocketDisconnect as refused:
+        assert refused.code == 1008
+    for socket in sockets:
+        socket.close()
+"""
+
+
+def test_live_convert(app_dir):
+    result = subprocess.run(
+        [sys.executable, "-c", LIVE_CONVERT_SCRIPT],
+        cwd=app_dir,
+        env=dict(os.environ, ADMIN_TOKEN="test-token", SNAPSHOT_ENABLED="false"),
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,145 @@
+"""
+Several app processes sharing one SQLite file and uploads/ directory:
+a file converted by one worker must be downloadable from another.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import subprocess
+import urllib.error
+import urllib.request
+
+import pytest
+from docx import Document
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(url: str, data: bytes = None, headers: dict = None):
+    req = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.read()
+
+
+def multipart(fields: dict, files: dict):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        body.write(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode()
+        )
+        body.write(content + b"\r\n")
+    body.write(f"--{boundary}--\r\n".encode())
+    return body.getvalue(), {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def start_worker(app_dir: str, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        ADMIN_TOKEN="test-token",
+        RATE_LIMIT_ENABLED="false",
+        SNAPSHOT_ENABLED="false",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=app_dir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("worker exited during startup")
+        try:
+            if request(f"http://127.0.0.1:{port}/health")[0] == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("worker did not start")
+
+
+@pytest.fixture(scope="module")
+def workers(app_dir):
+    processes = []
+    urls = []
+    try:
+        # One at a time, so only the first one creates the schema
+        for _ in range(2):
+            port = free_port()
+            processes.append(start_worker(app_dir, port))
+            urls.append(f"http://127.0.0.1:{port}")
+        yield urls
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+def test_download_from_another_worker(workers):
+    first, second = workers
+
+    document = Document()
+    document.add_paragraph("Salom dunyo")
+    source = io.BytesIO()
+    document.save(source)
+
+    body, headers = multipart({"direction": "latin_to_cyrillic"}, {"file": ("salom.docx", source.getvalue())})
+    status, content = request(f"{first}/api/upload-docx", body, headers)
+    assert status == 200, content
+    file_id = json.loads(content)["file_id"]
+
+    status, content = request(f"{second}/api/download/{file_id}")
+    assert status == 200
+    converted = Document(io.BytesIO(content))
+    assert converted.paragraphs[0].text == "Салом дунё"
+
+
+RACING_SESSION_SCRIPT = """
+import secrets
+import database
+
+database.init_db()
+first, second = database.SessionLocal(), database.SessionLocal()
+session_id = secrets.token_urlsafe(16)
+commit = first.commit
+
+def racing_commit():
+    # Another worker inserts the same session between our lookup and commit
+    second.add(database.UserSession(id=session_id, shown_ads=""))
+    second.commit()
+    first.commit = commit
+    commit()
+
+first.commit = racing_commit
+assert database.get_or_create_session(first, session_id).id == session_id
+assert database.get_or_create_session(first, "not-an-issued-id").id != "not-an-issued-id"
+"""
+
+
+def test_racing_first_requests_share_one_session(workers, app_dir):
+    result = subprocess.run(
+        [sys.executable, "-c", RACING_SESSION_SCRIPT],
+        cwd=app_dir,
+        env=dict(os.environ, ADMIN_TOKEN="test-token"),
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,32 @@
+"""
+static/js/translit.js: generated from the current rules and in parity with UzbekConverter
+"""
+
+import os
+import sys
+import shutil
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translit_js import (  # noqa: E402
+    PARITY_CORPUS,
+    TRANSLIT_JS_PATH,
+    build_translit_js,
+    check_parity,
+    write_translit_js,
+)
+
+
+def test_committed_module_is_current():
+    with open(TRANSLIT_JS_PATH, "r", encoding="utf-8") as f:
+        assert f.read() == build_translit_js(), "run: python translit_js.py"
+
+
+@pytest.mark.skipif(not shutil.which("node"), reason="node not found")
+def test_js_matches_python(tmp_path):
+    path = str(tmp_path / "translit.js")
+    assert write_translit_js(path)
+    assert not write_translit_js(path)
+    assert check_parity(PARITY_CORPUS, path) == []
@@ -0,0 +1,224 @@
+"""
+tracing.py - Per-request phase spans, recent-trace ring buffer and on-demand cProfile
+
+Every traced request gets a Trace in a context variable. Code marks its
+phases with `with span("name"):`. The variable is copied into
+asyncio.to_thread workers, so spans recorded in threads land in the same
+trace. Finished traces go into a bounded ring buffer (one per worker
+process).
+
+An admin can arm the profiler for the next N requests to a route. Those
+requests run under cProfile, both on the event loop thread and inside
+tracing.to_thread. The merged stats are written to PROFILE_DIR.
+Concurrent requests on the event loop are counted too, so profile under
+light load when possible.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import cProfile
+import pstats
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Sequence
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MAX_SPANS_PER_TRACE = 64
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("latinify_trace", default=None)
+_current_profiles: ContextVar[Optional[list]] = ContextVar("latinify_profiles", default=None)
+
+
+class Trace:
+    """
+    Timing of one request and its named phases
+    """
+
+    __slots__ = ("method", "path", "started_at", "start", "duration", "status", "spans", "profiled")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.status = None
+        self.spans = []  # (name, offset seconds, duration seconds)
+        self.profiled = False
+
+    def to_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 2),
+            "status": self.status,
+            "profiled": self.profiled,
+            "spans": [
+                {"name": name, "offset_ms": round(offset * 1000, 2), "duration_ms": round(duration * 1000, 2)}
+                for name, offset, duration in self.spans
+            ],
+        }
+
+
+@contextmanager
+def span(name: str):
+    """
+    Record the duration of a phase in the current request's trace (no-op outside requests)
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if len(trace.spans) < MAX_SPANS_PER_TRACE:
+            trace.spans.append((name, start - trace.start, time.perf_counter() - start))
+
+
+async def to_thread(func: Callable, *args, **kwargs):
+    """
+    asyncio.to_thread that also profiles the call when the request is being profiled
+    """
+    profiles = _current_profiles.get()
+    if profiles is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    def profiled():
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            profiles.append(profile)
+
+    return await asyncio.to_thread(profiled)
+
+
+class TraceBuffer:
+    """
+    Ring buffer of the most recent finished traces
+    """
+
+    def __init__(self, size: int):
+        self._traces = deque(maxlen=size)
+
+    def add(self, trace: Trace):
+        self._traces.append(trace)
+
+    def slowest(self, limit: int = 20, path: Optional[str] = None) -> list:
+        traces = [trace for trace in list(self._traces) if path is None or trace.path == path]
+        traces.sort(key=lambda trace: trace.duration, reverse=True)
+        return [trace.to_dict() for trace in traces[:limit]]
+
+    def __len__(self):
+        return len(self._traces)
+
+
+class Profiler:
+    """
+    Runs cProfile on the next N requests to an armed route and keeps the
+    merged stats in PROFILE_DIR/<profile_id>.prof
+    """
+
+    def __init__(self, directory: str, max_requests: int = 100):
+        self.directory = directory
+        self.max_requests = max_requests
+        self.sessions: Dict[str, dict] = {}  # path -> {"id", "remaining", "profiled"}
+        self._active = False  # one profiled request at a time per process
+        self._lock = threading.Lock()
+
+    def arm(self, path: str, count: int) -> dict:
+        count = max(1, min(count, self.max_requests))
+        session = {"id": uuid.uuid4().hex[:12], "path": path, "remaining": count, "profiled": 0}
+        self.sessions[path] = session
+        return dict(session)
+
+    def status(self) -> list:
+        return [dict(session) for session in self.sessions.values()]
+
+    def path_for(self, profile_id: str) -> Optional[str]:
+        if not profile_id.isalnum():
+            return None
+        filepath = os.path.join(self.directory, f"{profile_id}.prof")
+        return filepath if os.path.exists(filepath) else None
+
+    def claim(self, path: str) -> Optional[dict]:
+        """
+        Session to profile this request with, if its route is armed
+        """
+        session = self.sessions.get(path)
+        if session is None or session["remaining"] <= 0 or self._active:
+            return None
+        session["remaining"] -= 1
+        self._active = True
+        return session
+
+    def finish(self, session: dict, profiles: list):
+        """
+        Merge this request's profiles into the session's stats file
+        """
+        self._active = False
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            filepath = os.path.join(self.directory, f"{session['id']}.prof")
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            if os.path.exists(filepath):
+                stats.add(filepath)
+            stats.dump_stats(filepath)
+            session["profiled"] += 1
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware creating a Trace per request under the given path prefixes
+    """
+
+    def __init__(self, app: ASGIApp, buffer: TraceBuffer, profiler: Profiler, paths: Sequence[str]):
+        self.app = app
+        self.buffer = buffer
+        self.profiler = profiler
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], scope["path"])
+
+        async def send_with_status(message: Message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+            await send(message)
+
+        trace_token = _current_trace.set(trace)
+        session = self.profiler.claim(scope["path"])
+        profiles = None
+        if session is not None:
+            trace.profiled = True
+            profiles = []
+            profiles_token = _current_profiles.set(profiles)
+            profile = cProfile.Profile()
+            profile.enable()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if session is not None:
+                profile.disable()
+                profiles.append(profile)
+                _current_profiles.reset(profiles_token)
+                self.profiler.finish(session, profiles)
+            trace.duration = time.perf_counter() - trace.start
+            _current_trace.reset(trace_token)
+            self.buffer.add(trace)
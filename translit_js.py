@@ -0,0 +1,333 @@
+"""
+translit_js.py - Generate static/js/translit.js from UzbekConverter rule tables
+
+The browser converts text locally with the same word rules, exception lexicon
+and ordered character tables as the server.
+Regenerate after changing converter.py or data/lexicon.tsv:
+    python translit_js.py            # write static/js/translit.js
+    python translit_js.py --check    # verify it is current and matches Python (needs node)
+"""
+
+import os
+import sys
+import json
+import hashlib
+import shutil
+import subprocess
+
+from converter import UzbekConverter, WORD_CACHE_SIZE
+
+TRANSLIT_JS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "js", "translit.js")
+
+# Sample corpus for the Python/JS parity check
+PARITY_CORPUS = [
+    "Salom dunyo! O'zbekiston, g‘alaba, o‘qituvchi, shahar, choy, yangi.",
+    "Yoshlar yulduz yetakchi Yaxshi Ng Sh Ch G'ayrat O‘rmon `test` ’quote’",
+    "Тошкент шаҳри, ўзбек тили, ғалаба, янги йўл, юлдуз, ёшлар, ер.",
+    "НГ Нг нг Ў Ғ Ё Я Ю Е Ш Ч, рақамлар 123 ва belgilar: ;-)",
+    "   ",
+    "Mixed матн with both алифбо",
+    "Елка ер ЕР Январь концерт Революция станция объект съезд маъно Электр ЦЕНТР Ё",
+    "ma'no as'hob ekran Ekran EKRAN konsert Yanvar KONSERT 'quote' yetti O‘G‘IL",
+]
+
+TEMPLATE = """/*
+ * translit.js - Uzbek Latin <-> Cyrillic conversion in the browser
+ * Generated by translit_js.py from converter.UzbekConverter. Do not edit.
+ */
+(function (root) {
+    'use strict';
+
+    const VERSION = %(version)s;
+    const LATIN_TO_CYRILLIC = %(latin_to_cyrillic)s;
+    const CYRILLIC_TO_LATIN = %(cyrillic_to_latin)s;
+    const STRIPPED_MARKS = %(stripped_marks)s;
+    const CYRILLIC_PATTERN = new RegExp(%(cyrillic_pattern)s, 'g');
+    const LATIN_PATTERN = new RegExp(%(latin_pattern)s, 'g');
+    const WORD_PATTERN = new RegExp(%(word_pattern)s, 'g');
+    const CYRILLIC_VOWELS = %(cyrillic_vowels)s;
+    const LEXICON = %(lexicon)s;
+    const WORD_CACHE_SIZE = %(word_cache_size)s;
+
+    const MARKS = STRIPPED_MARKS.join('');
+    const SEPARATED_SH = new RegExp('([sS])[' + MARKS + ']([hH])', 'g');
+    const O_G_MARK = new RegExp('([oOgG])[' + MARKS + ']', 'g');
+    const INNER_MARK = new RegExp('[' + MARKS + ']', 'g');
+    const LATIN_SPECIALS = { s: 'с', S: 'С', h: 'ҳ', H: 'Ҳ', o: 'ў', O: 'Ў', g: 'ғ', G: 'Ғ' };
+    const TO_LATIN = new Map(LEXICON.map(([cyrillic, latin]) => [cyrillic, latin]));
+    const TO_CYRILLIC = new Map(LEXICON.map(([cyrillic, latin]) => [latin, cyrillic]));
+    const wordCache = new Map();
+
+    // Same semantics as Python str.replace: non-overlapping, left to right
+    function replaceAll(text, from, to) {
+        return text.split(from).join(to);
+    }
+
+    function countMatches(text, pattern) {
+        const matches = text.match(pattern);
+        return matches ? matches.length : 0;
+    }
+
+    function detectAlphabet(text) {
+        return countMatches(text, CYRILLIC_PATTERN) > countMatches(text, LATIN_PATTERN) ? 'cyrillic' : 'latin';
+    }
+
+    function latinToCyrillic(text) {
+        for (const mark of STRIPPED_MARKS) {
+            text = replaceAll(text, mark, '');
+        }
+        for (const [latin, cyrillic] of LATIN_TO_CYRILLIC) {
+            text = replaceAll(text, latin, cyrillic);
+        }
+        return text;
+    }
+
+    function cyrillicToLatin(text) {
+        for (const [cyrillic, latin] of CYRILLIC_TO_LATIN) {
+            text = replaceAll(text, cyrillic, latin);
+        }
+        return text;
+    }
+
+    function isUpper(text) {
+        return text === text.toUpperCase() && text !== text.toLowerCase();
+    }
+
+    function capitalize(text) {
+        return text.charAt(0).toUpperCase() + text.slice(1).toLowerCase();
+    }
+
+    function matchCase(source, converted) {
+        if (source.length > 1 && isUpper(source)) {
+            return converted.toUpperCase();
+        }
+        if (isUpper(source.charAt(0))) {
+            return converted.charAt(0).toUpperCase() + converted.slice(1);
+        }
+        return converted;
+    }
+
+    function wordToLatin(word) {
+        const exception = TO_LATIN.get(word.toLowerCase());
+        if (exception !== undefined) {
+            return matchCase(word, exception);
+        }
+
+        let parts = '';
+        let previous = '';
+        for (const char of word) {
+            const current = char.toLowerCase();
+            let latin;
+            if (current === 'е') {
+                latin = !previous || CYRILLIC_VOWELS.includes(previous) ? 'ye' : 'e';
+            } else if (current === 'ц') {
+                latin = previous && CYRILLIC_VOWELS.includes(previous) ? 'ts' : 's';
+            } else if (current === 'ь') {
+                latin = '';
+            } else if (current === 'ъ') {
+                latin = "'";
+            } else if (current === 'э') {
+                latin = 'e';
+            } else {
+                parts += char;
+                previous = current;
+                continue;
+            }
+            if (isUpper(char)) {
+                latin = word.length > 1 && isUpper(word) ? latin.toUpperCase() : capitalize(latin);
+            }
+            parts += latin;
+            previous = current;
+        }
+        return cyrillicToLatin(parts);
+    }
+
+    function wordToCyrillic(word) {
+        const exception = TO_CYRILLIC.get(word.toLowerCase().replace(INNER_MARK, "'"));
+        if (exception !== undefined) {
+            return matchCase(word, exception);
+        }
+
+        word = word.replace(SEPARATED_SH, (match, s, h) => LATIN_SPECIALS[s] + LATIN_SPECIALS[h]);
+        word = word.replace(O_G_MARK, (match, letter) => LATIN_SPECIALS[letter]);
+        word = word.replace(INNER_MARK, 'ъ');
+        if (word.charAt(0) === 'e' || word.charAt(0) === 'E') {
+            word = (word.charAt(0) === 'E' ? 'Э' : 'э') + word.slice(1);
+        }
+        return latinToCyrillic(word);
+    }
+
+    function convertWord(word, direction) {
+        const key = direction + ':' + word;
+        let converted = wordCache.get(key);
+        if (converted === undefined) {
+            converted = direction === 'latin_to_cyrillic' ? wordToCyrillic(word) : wordToLatin(word);
+            if (wordCache.size >= WORD_CACHE_SIZE) {
+                // Drop the older half (insertion order), like the server memo
+                let drop = wordCache.size >> 1;
+                for (const oldKey of wordCache.keys()) {
+                    if (drop-- <= 0) break;
+                    wordCache.delete(oldKey);
+                }
+            }
+            wordCache.set(key, converted);
+        }
+        return converted;
+    }
+
+    function convertWords(text, direction) {
+        let converted = text.replace(WORD_PATTERN, (word) => convertWord(word, direction));
+        if (direction === 'latin_to_cyrillic') {
+            for (const mark of STRIPPED_MARKS) {
+                converted = replaceAll(converted, mark, '');
+            }
+        }
+        return converted;
+    }
+
+    function resolveDirection(text, direction) {
+        if (direction === 'latin_to_cyrillic' || direction === 'cyrillic_to_latin') {
+            return direction;
+        }
+        return detectAlphabet(text) === 'latin' ? 'latin_to_cyrillic' : 'cyrillic_to_latin';
+    }
+
+    function convert(text, direction) {
+        return convertWords(text, direction);
+    }
+
+    // Mirrors UzbekConverter.convert_text: returns {converted, direction}
+    function convertText(text, direction = 'auto') {
+        if (!text.trim()) {
+            return { converted: text, direction: 'none' };
+        }
+        const resolved = resolveDirection(text, direction);
+        return { converted: convert(text, resolved), direction: resolved };
+    }
+
+    const Translit = {
+        VERSION,
+        detectAlphabet,
+        latinToCyrillic,
+        cyrillicToLatin,
+        resolveDirection,
+        convertWords,
+        convert,
+        convertText
+    };
+
+    if (typeof module === 'object' && module.exports) {
+        module.exports = Translit;
+    } else {
+        root.Translit = Translit;
+    }
+})(this);
+"""
+
+
+def _tables() -> dict:
+    return {
+        "latin_to_cyrillic": [list(rule) for rule in UzbekConverter.LATIN_TO_CYRILLIC],
+        "cyrillic_to_latin": [list(rule) for rule in UzbekConverter.CYRILLIC_TO_LATIN],
+        "stripped_marks": list(UzbekConverter.STRIPPED_MARKS),
+        "cyrillic_pattern": UzbekConverter.CYRILLIC_PATTERN,
+        "latin_pattern": UzbekConverter.LATIN_PATTERN,
+        "word_pattern": UzbekConverter.WORD_PATTERN,
+        "cyrillic_vowels": UzbekConverter.CYRILLIC_VOWELS,
+        "lexicon": [list(pair) for pair in UzbekConverter.LEXICON.pairs],
+        "word_cache_size": WORD_CACHE_SIZE,
+    }
+
+
+def rules_version(tables: dict = None) -> str:
+    """
+    Short hash of the exported rule tables and lexicon
+    """
+    return hashlib.sha256(
+        json.dumps(tables or _tables(), ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:12]
+
+
+def build_translit_js() -> str:
+    """
+    Render the JS module; VERSION is a hash of the exported tables
+    """
+    tables = _tables()
+    values = {key: json.dumps(value, ensure_ascii=False) for key, value in tables.items()}
+    values["version"] = json.dumps(rules_version(tables))
+    return TEMPLATE % values
+
+
+def write_translit_js(path: str = TRANSLIT_JS_PATH) -> bool:
+    """
+    Write the module if it changed; returns True when the file was updated
+    """
+    source = build_translit_js()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == source:
+                return False
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(source)
+    os.replace(tmp_path, path)
+    return True
+
+
+def check_parity(corpus=PARITY_CORPUS, path: str = TRANSLIT_JS_PATH) -> list:
+    """
+    Run Python and JS converters on the corpus; returns mismatching samples
+    """
+    script = (
+        "const T = require(process.argv[1]);"
+        "const corpus = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "const out = [];"
+        "for (const text of corpus) for (const d of ['auto', 'latin_to_cyrillic', 'cyrillic_to_latin'])"
+        " out.push(T.convertText(text, d));"
+        "process.stdout.write(JSON.stringify(out));"
+    )
+    result = subprocess.run(
+        ["node", "-e", script, os.path.abspath(path)],
+        input=json.dumps(corpus).encode("utf-8"),
+        capture_output=True,
+        check=True
+    )
+    js_results = iter(json.loads(result.stdout.decode("utf-8")))
+
+    mismatches = []
+    for text in corpus:
+        for direction in ("auto", "latin_to_cyrillic", "cyrillic_to_latin"):
+            if text.strip():
+                resolved = UzbekConverter.resolve_direction(text, direction)
+                expected = {"converted": UzbekConverter.convert(text, resolved), "direction": resolved}
+            else:
+                expected = {"converted": text, "direction": "none"}
+            actual = next(js_results)
+            if actual != expected:
+                mismatches.append({"text": text, "direction": direction, "python": expected, "js": actual})
+    return mismatches
+
+
+if __name__ == "__main__":
+    if "--check" not in sys.argv:
+        changed = write_translit_js()
+        print(f"✅ {TRANSLIT_JS_PATH} {'updated' if changed else 'is up to date'}")
+        sys.exit(0)
+
+    with open(TRANSLIT_JS_PATH, "r", encoding="utf-8") as f:
+        if f.read() != build_translit_js():
+            print("❌ translit.js is out of date, run: python translit_js.py")
+            sys.exit(1)
+    if not shutil.which("node"):
+        print("⚠️ node not found, parity check skipped")
+        sys.exit(0)
+    mismatches = check_parity()
+    for mismatch in mismatches:
+        print(f"❌ {json.dumps(mismatch, ensure_ascii=False)}")
+    if mismatches:
+        sys.exit(1)
+    print(f"✅ Python and JS converters agree on {len(PARITY_CORPUS)} samples")